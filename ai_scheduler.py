@@ -0,0 +1,56 @@
+from settings import *
+from profiler import profiler
+
+
+class AIScheduler:
+    # engaged npcs think every tick, idle ones at a reduced rate inside a per-tick time budget
+    def __init__(self, game):
+        self.game = game
+        self.ticks = 0
+        self.due = {}  # idle npc: tick of its next update
+        self.update_cost = 0  # running average seconds per reduced-rate update
+        self.full_rate_time = 0  # running average seconds of the full-rate updates, taken off the budget
+
+    def get_interval(self, npc):
+        player = self.game.player
+        if not npc.alive or npc.pain or npc.player_search_trigger:
+            return 1
+        near = (npc.x - player.x) ** 2 + (npc.y - player.y) ** 2 < AI_NEAR_DIST ** 2
+        return AI_IDLE_INTERVAL if near else AI_FAR_INTERVAL
+
+    def get_intervals(self, npcs):
+        storage = self.game.npc_storage
+        if storage is None:
+            return [self.get_interval(npc) for npc in npcs]
+        intervals = storage.get_intervals()
+        return [intervals[npc.slot] for npc in npcs]
+
+    def schedule(self, npcs):
+        # split this tick's npcs into the full-rate ones and the most overdue idle ones that fit the budget
+        self.ticks += 1
+        full_rate, waiting = [], []
+        for npc, interval in zip(npcs, self.get_intervals(npcs)):
+            if interval == 1:
+                full_rate.append(npc)
+                self.due.pop(npc, None)
+            # a newly seen npc's first update is staggered over its interval by how many are already waiting
+            elif self.due.setdefault(npc, self.ticks + (len(self.due) % interval)) <= self.ticks:
+                waiting.append((self.due[npc], interval, npc))
+
+        waiting.sort(key=lambda item: item[0])
+        budget = len(waiting)
+        if self.update_cost:
+            budget = max(1, int((AI_TIME_BUDGET / 1000 - self.full_rate_time) / self.update_cost))
+        profiler.count('ai updates deferred', max(0, len(waiting) - budget))  # overdue, pushed to a later tick
+        reduced_rate = []
+        for _, interval, npc in waiting[:budget]:
+            self.due[npc] = self.ticks + interval
+            reduced_rate.append(npc)
+        return full_rate, reduced_rate
+
+    def record(self, full_rate_elapsed, count, elapsed):
+        # engaged npcs (with their path and line-of-sight queries) use the budget first
+        self.full_rate_time = 0.9 * self.full_rate_time + 0.1 * full_rate_elapsed
+        if count:
+            cost = elapsed / count
+            self.update_cost = cost if not self.update_cost else 0.9 * self.update_cost + 0.1 * cost
@@ -0,0 +1,54 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from settings import *
+
+
+class AIWorkerPool:
+    # ai queries run on worker threads against snapshots, their results are picked up on a later tick.
+    # the searches are pure python and hold the GIL, so this is not extra cores: it overlaps them with the
+    # numpy casts and pygame blits that release it, and lets a slow search finish over the next ticks
+    # instead of inside one. benchmark.py --npcs 80 --hunt --pathfinding search: ObjectHandler.update p95 20.7 -> 2.4 ms,
+    # but frame p95 38 -> 51 ms as the searches contend with rendering for the GIL, flow-field mode is within noise
+    def __init__(self, workers):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='ai') if workers else None
+        self.jobs = {}  # key: (future, tick submitted)
+        self.ticks = 0
+        self.late = 0  # results the main thread had to wait for
+
+    def tick(self):
+        self.ticks += 1
+        # nobody asked again for these, e.g. the npc has left the tile it searched from
+        expired = [key for key, (future, submitted) in self.jobs.items()
+                   if future.done() and self.ticks - submitted > AI_MAX_LATENCY + 1]
+        for key in expired:
+            del self.jobs[key]
+
+    def clear(self):
+        for future, _ in self.jobs.values():
+            future.cancel()
+        self.jobs = {}
+
+    def submit(self, key, func, *args):
+        if key in self.jobs:
+            return
+        if self.executor is None:
+            future = Future()
+            future.set_result(func(*args))
+        else:
+            future = self.executor.submit(func, *args)
+        self.jobs[key] = future, self.ticks
+
+    def get(self, key):
+        # finished result, None while it is still running, waited for once AI_MAX_LATENCY ticks have passed
+        if key not in self.jobs:
+            return None
+        future, submitted = self.jobs[key]
+        if not future.done():
+            if self.ticks - submitted < AI_MAX_LATENCY:
+                return None
+            self.late += 1
+        del self.jobs[key]
+        return future.result()
+
+    def run(self, key, func, *args):
+        self.submit(key, func, *args)
+        return self.get(key)
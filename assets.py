@@ -0,0 +1,72 @@
+import pygame as pg
+import asyncio
+import os
+import time
+from settings import *
+
+
+class AssetRegistry:
+    def __init__(self):
+        self.images = {}
+        self.frames = {}
+        self.stats = {}
+
+    def get_image(self, path, res=None):
+        key = path if res is None else (path, tuple(res))
+        image = self.images.get(key)
+        if image is None:
+            time_start = time.perf_counter()
+            image = pg.image.load(path).convert_alpha()
+            if res is not None:
+                image = pg.transform.scale(image, res)
+            self.images[key] = image
+            self.stats[key] = (time.perf_counter() - time_start) * 1000, self.get_size(image)
+        return image
+
+    def get_frames(self, path):
+        # frames are shared between instances, callers copy them into their own deque
+        frames = self.frames.get(path)
+        if frames is None:
+            frames = self.frames[path] = tuple(
+                self.get_image(path + '/' + file_name) for file_name in os.listdir(path)
+                if os.path.isfile(os.path.join(path, file_name))
+            )
+        return frames
+
+    async def preload(self, images=(), frame_dirs=()):
+        # fill the cache in PRELOAD_SLICE ms slices, handing the event loop back to the menu in between
+        jobs = [(self.get_image, path, res) for path, res in images]
+        jobs += [(self.get_frames, path) for path in frame_dirs]
+        slice_start = time.perf_counter()
+        for func, *args in jobs:
+            func(*args)
+            if time.perf_counter() - slice_start > PRELOAD_SLICE / 1000:
+                await asyncio.sleep(0)
+                slice_start = time.perf_counter()
+
+    @staticmethod
+    def get_frame_dirs(root):
+        # every folder holding images under root, spelled the way the sprites ask for them
+        return [dir_path.replace(os.sep, '/') for dir_path, _, file_names in os.walk(root) if file_names]
+
+    @staticmethod
+    def get_size(image):
+        return image.get_width() * image.get_height() * image.get_bytesize()
+
+    def get_report(self, limit=None):
+        # slowest first, limit keeps only that many lines above the total
+        lines = [f'{"load ms":>8} {"KiB":>8}  asset']
+        for key, (load_time, size) in sorted(self.stats.items(), key=lambda item: -item[1][0])[:limit]:
+            lines.append(f'{load_time:8.2f} {size / 1024:8.1f}  {key}')
+        total_time = sum(load_time for load_time, _ in self.stats.values())
+        total_size = sum(size for _, size in self.stats.values())
+        lines.append(f'{total_time:8.2f} {total_size / 1024:8.1f}  total ({len(self.stats)} assets)')
+        return '\n'.join(lines)
+
+    def get_totals(self):
+        return {'count': len(self.stats),
+                'load_ms': round(sum(load_time for load_time, _ in self.stats.values()), 3),
+                'KiB': round(sum(size for _, size in self.stats.values()) / 1024, 1)}
+
+
+assets = AssetRegistry()
@@ -0,0 +1,265 @@
+"""Headless, deterministic frame benchmark.
+
+Runs the game loop under SDL's dummy video/audio drivers with a fixed seed,
+scripted player input, one simulation tick per frame and the blockchain calls
+stubbed out, then prints the per-frame timings as JSON:
+
+    python benchmark.py --frames 600 --seed 1 --runs 5 --output before.json
+
+The scripted player rarely meets an NPC, so by default the AI stays idle.
+--npcs sets how many NPCs spawn and --hunt sends all of them after the
+player from the first tick, which times pathfinding, line of sight, shots
+and the AI scheduler under load:
+
+    python benchmark.py --npcs 80 --hunt --pathfinding search --ai-workers 2
+
+With no AI workers every run replays the same frames, but the timings still
+move with the host between runs. --runs repeats the measurement on a fresh
+game and reports the median of each statistic, with every run's summary
+listed under "runs_ms".
+"""
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import pygame as pg
+import main
+import pathfinding
+from collections import deque
+from profiler import profiler
+from assets import assets
+from settings import *
+
+SECTIONS = ('Player.update', 'RayCasting.update', 'ObjectHandler.update', 'ObjectRenderer.draw', 'frame')
+
+# (frames, keys held, mouse x movement per frame), played in a loop
+INPUT_SCRIPT = (
+    (60, (pg.K_w,), 0),
+    (60, (pg.K_w,), 12),
+    (60, (pg.K_d,), 0),
+    (60, (pg.K_s,), -12),
+    (60, (pg.K_a, pg.K_w), 6),
+)
+FIRE_INTERVAL = 45  # frames between scripted shots
+
+
+class ScriptedKeys:
+    def __init__(self, keys):
+        self.keys = keys
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+class ScriptedPlayer(main.Player):
+    keys = ScriptedKeys(())
+    mouse_rel = 0
+
+    def get_pressed_keys(self):
+        return self.keys
+
+    def mouse_control(self):
+        self.rel = max(-MOUSE_MAX_REL, min(MOUSE_MAX_REL, self.mouse_rel))
+        self.angle += self.rel * MOUSE_SENSITIVITY * self.game.delta_time
+
+
+class BenchmarkObjectHandler(main.ObjectHandler):
+    npcs = None  # None keeps the game's own count
+    hunt = False
+
+    def spawn_npc(self):
+        if self.npcs is not None:
+            self.enemies = self.npcs
+        super().spawn_npc()
+        if self.hunt:
+            for npc in self.npc_list:
+                npc.player_search_trigger = True
+
+    def check_win(self):
+        pass  # an emptied level keeps running instead of blocking on the win screen
+
+
+class BenchmarkGame(main.Game):
+    def generate_wallet(self):
+        self.account = None
+        self.wallet_address = None
+
+    def trigger_game_end(self, end_type):
+        # keep the loop running so every run renders the same number of frames
+        self.game_end_type = end_type
+
+    def increment_score(self, amount):
+        self.score += amount
+
+    async def update_score(self):
+        pass
+
+    async def fetch_leaderboard(self):
+        self.leaderboard = []
+
+
+def play_script(frame):
+    frame %= sum(length for length, _, _ in INPUT_SCRIPT)
+    for length, keys, mouse_rel in INPUT_SCRIPT:
+        if frame < length:
+            ScriptedPlayer.keys = ScriptedKeys(keys)
+            ScriptedPlayer.mouse_rel = mouse_rel
+            return
+        frame -= length
+
+
+async def run_frame(game, frame):
+    play_script(frame)
+    if frame % FIRE_INTERVAL == 0:
+        pg.event.post(pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=(HALF_WIDTH, HALF_HEIGHT)))
+    game.check_events()
+    await game.update()
+    game.draw()
+    # exactly one simulation tick per frame, however fast the host renders
+    game.frame_time = SIM_DT
+    profiler.end_frame()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def summarize(frames):
+    samples = []
+    for _, frame_time, events in frames:
+        sample = profiler.get_section_times(events)
+        sample['frame'] = frame_time
+        samples.append(sample)
+
+    summary = {}
+    for name in SECTIONS:
+        values = [sample.get(name, 0) * 1000 for sample in samples]
+        summary[name] = {
+            'mean': round(sum(values) / len(values), 3),
+            'p50': round(percentile(values, 50), 3),
+            'p95': round(percentile(values, 95), 3),
+            'p99': round(percentile(values, 99), 3),
+            'max': round(max(values), 3),
+        }
+    return summary
+
+
+def get_hit_rates(counters):
+    # '<cache> hits' and '<cache> misses' counters as one rate per cache, None when it was never asked
+    hit_rates = {}
+    for name, (hits, _) in counters.items():
+        if name.endswith(' hits'):
+            cache = name[:-len(' hits')]
+            total = hits + counters.get(cache + ' misses', (0, 0))[0]
+            hit_rates[cache] = round(hits / total, 3) if total else None
+    return hit_rates
+
+
+def get_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_median(summaries):
+    # each statistic of each section, median over the runs
+    return {name: {stat: round(statistics.median(summary[name][stat] for summary in summaries), 3)
+                   for stat in summaries[0][name]}
+            for name in SECTIONS}
+
+
+async def run_once(frames, warmup, seed):
+    random.seed(seed)
+    game = BenchmarkGame()
+    game.start_game()
+    game.frame_time = SIM_DT
+
+    for frame in range(warmup + frames):
+        if frame == warmup:
+            profiler.frames = deque(maxlen=frames)
+            profiler.frame_counters = deque(maxlen=frames)
+        await run_frame(game, frame)
+        await asyncio.sleep(0)
+
+    if game.ai_workers.executor is not None:
+        game.ai_workers.executor.shutdown()
+    return game
+
+
+async def run(frames, warmup, seed, ai_workers, runs=1, npcs=None, hunt=False, pathfinding_mode=PATHFINDING_MODE):
+    main.Player = ScriptedPlayer
+    main.ObjectHandler = BenchmarkObjectHandler
+    main.AI_WORKERS = ai_workers
+    BenchmarkObjectHandler.npcs, BenchmarkObjectHandler.hunt = npcs, hunt
+    pathfinding.PATHFINDING_MODE = pathfinding_mode
+    profiler.enabled = True
+    summaries = []
+    for _ in range(runs):
+        game = await run_once(frames, warmup, seed)
+        summaries.append(summarize(profiler.frames))
+
+    return {
+        'revision': get_revision(),
+        'seed': seed,
+        'frames': frames,
+        'warmup': warmup,
+        'runs': runs,
+        'resolution': RES,
+        'num_rays': NUM_RAYS,
+        'sim_tick_rate': SIM_TICK_RATE,
+        'ray_casting_engine': RAY_CASTING_ENGINE,
+        'render_mode': RENDER_MODE,
+        'ai_workers': ai_workers,
+        'scenario': {'npcs': len(game.object_handler.npc_list), 'hunt': hunt, 'pathfinding_mode': pathfinding_mode},
+        'npcs_alive': game.object_handler.alive_count,
+        'score': game.score,
+        'player_health': game.player.health,
+        'assets': assets.get_totals(),
+        'timings_ms': get_median(summaries),
+        'runs_ms': summaries,
+        # the profiler's own summaries cover the last run
+        'profiler_ms': {name: {'mean': round(average, 3), 'max': round(worst, 3)}
+                        for name, (average, worst) in profiler.get_summary().items()},
+        'counters': {name: {'mean': round(average, 3), 'max': worst}
+                     for name, (average, worst) in profiler.get_counter_summary().items()},
+        'cache_hit_rates': get_hit_rates(profiler.get_counter_summary()),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Headless Ben-Ton frame benchmark')
+    parser.add_argument('--frames', type=int, default=600, help='measured frames')
+    parser.add_argument('--warmup', type=int, default=60, help='frames run before measuring')
+    parser.add_argument('--seed', type=int, default=1, help='seed for NPC spawns and AI rolls')
+    parser.add_argument('--ai-workers', type=int, default=0,
+                        help='AI worker threads, the default 0 keeps runs deterministic')
+    parser.add_argument('--npcs', type=int, help='NPCs spawned, the game spawns 20')
+    parser.add_argument('--hunt', action='store_true', help='every NPC chases the player from the first tick')
+    parser.add_argument('--pathfinding', choices=('flow_field', 'search'), default=PATHFINDING_MODE,
+                        help='NPC pathfinding mode')
+    parser.add_argument('--runs', type=int, default=1, help='measured runs, timings_ms is their median')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    report = asyncio.run(run(args.frames, args.warmup, args.seed, args.ai_workers, args.runs, args.npcs, args.hunt,
+                             args.pathfinding))
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(report_json + '\n')
+    else:
+        print(report_json)
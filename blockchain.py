@@ -0,0 +1,11 @@
+# the aptos sdk and aiohttp take a while to import, Game.get_chain imports this module the first time it needs them
+import aiohttp
+from aptos_sdk.account import Account
+from aptos_sdk.async_client import RestClient, FaucetClient
+from aptos_sdk.transactions import TransactionArgument, TransactionPayload, EntryFunction
+from aptos_sdk.bcs import Serializer
+from aptos_sdk.type_tag import TypeTag, StructTag
+from aptos_sdk.account_address import AccountAddress
+
+NODE_URL = "https://fullnode.devnet.aptoslabs.com/v1"
+FAUCET_URL = "https://faucet.devnet.aptoslabs.com"
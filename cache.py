@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    def __init__(self, max_size=1024, max_bytes=None, get_bytes=None):
+        # max_bytes also caps the summed get_bytes(value) of the entries, for caches of big surfaces
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.get_bytes = get_bytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        value = self.entries.get(key, default)
+        if value is default:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if key in self.entries:
+            self.pop(key)
+        self.entries[key] = value
+        if self.get_bytes is not None:
+            self.sizes[key] = self.get_bytes(value)
+            self.bytes += self.sizes[key]
+        while len(self.entries) > self.max_size or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            self.pop(next(iter(self.entries)))
+
+    def pop(self, key):
+        del self.entries[key]
+        self.bytes -= self.sizes.pop(key, 0)
+
+    def clear(self):
+        self.entries.clear()
+        self.sizes.clear()
+        self.bytes = 0
+
+    def reset_stats(self):
+        self.hits, self.misses = 0, 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,56 @@
+from settings import *
+
+
+class ChunkManager:
+    # the world in CHUNK_SIZE tile squares, only entities in the ones around the player are simulated and drawn
+    # tiles, nav data and the spatial index are not chunked and still cover the whole map
+    def __init__(self):
+        self.buckets = {}  # chunk: {entity: None}
+        self.chunks = {}  # entity: chunk
+        self.order = {}  # entity: insertion order, keeps update order stable across chunks
+        self.center = None
+        self.active_chunks = set()
+        self.active = []  # entities in active chunks
+        self.dirty = True
+
+    @staticmethod
+    def get_chunk(x, y):
+        return int(x) // CHUNK_SIZE, int(y) // CHUNK_SIZE
+
+    @classmethod
+    def get_bounds(cls, x, y):
+        # (x0, y0, x1, y1) tiles of the active region when the player stands at x, y
+        chunk_x, chunk_y = cls.get_chunk(x, y)
+        return ((chunk_x - CHUNK_RADIUS) * CHUNK_SIZE, (chunk_y - CHUNK_RADIUS) * CHUNK_SIZE,
+                (chunk_x + CHUNK_RADIUS + 1) * CHUNK_SIZE, (chunk_y + CHUNK_RADIUS + 1) * CHUNK_SIZE)
+
+    def add(self, entity):
+        chunk = self.get_chunk(entity.x, entity.y)
+        self.order[entity] = len(self.order)
+        self.chunks[entity] = chunk
+        self.buckets.setdefault(chunk, {})[entity] = None
+        self.dirty = self.dirty or chunk in self.active_chunks
+
+    def move(self, entity):
+        chunk, old_chunk = self.get_chunk(entity.x, entity.y), self.chunks[entity]
+        if chunk != old_chunk:
+            del self.buckets[old_chunk][entity]
+            self.buckets.setdefault(chunk, {})[entity] = None
+            self.chunks[entity] = chunk
+            self.dirty = self.dirty or (chunk in self.active_chunks) != (old_chunk in self.active_chunks)
+
+    def is_active(self, entity):
+        return self.chunks[entity] in self.active_chunks
+
+    def update(self, x, y):
+        # activate the chunks around the player, the rest sleep until the player comes back
+        center = self.get_chunk(x, y)
+        if center != self.center:
+            self.center = center
+            self.active_chunks = {(center[0] + i, center[1] + j) for i in range(-CHUNK_RADIUS, CHUNK_RADIUS + 1)
+                                  for j in range(-CHUNK_RADIUS, CHUNK_RADIUS + 1)}
+            self.dirty = True
+        if self.dirty:
+            self.dirty = False
+            self.active = sorted((entity for chunk in self.active_chunks for entity in self.buckets.get(chunk, ())),
+                                 key=self.order.get)
@@ -0,0 +1,129 @@
+import math
+import numpy as np
+from profiler import profiler, profile
+from settings import *
+
+
+class LineOfSight:
+    def __init__(self, game):
+        self.game = game
+        self.visible = {}  # (player tile, npc tile): can the npc see the player
+        self.player_pos = None
+        self.map_version = None
+        self.grid = None  # copy of Map.grid the worker casts read
+        self.requests = []  # (worker job, keys it answers)
+        self.in_flight = set()
+        self.deferred = set()  # keys over this tick's AI_LOS_QUOTA
+        self.rays_cast = 0
+
+    @profile('LineOfSight.update')
+    def update(self, npcs):
+        # one batched cast per tick for every npc tile the cache doesn't already know
+        player = self.game.player
+        if player.pos != self.player_pos or self.game.map.version != self.map_version:
+            self.visible = {}
+            if self.game.map.version != self.map_version:
+                self.grid = self.game.map.grid.copy()
+            self.player_pos, self.map_version = player.pos, self.game.map.version
+
+        # npcs come engaged first, so those keep their rays when the quota runs out
+        pending = {}
+        self.deferred = set()
+        for npc in npcs:
+            if not npc.alive:
+                continue
+            key = player.map_pos, npc.map_pos
+            if key not in self.visible and key not in self.in_flight and key not in pending:
+                if len(pending) < AI_LOS_QUOTA:
+                    pending[key] = npc.x, npc.y
+                else:
+                    self.deferred.add(key)
+        profiler.count('line of sight rays deferred', len(self.deferred))
+        if pending:
+            job = 'line_of_sight', self.game.ai_workers.ticks
+            self.game.ai_workers.submit(job, self.cast, self.player_pos, list(pending.values()), self.grid)
+            self.requests.append((job, list(pending)))
+            self.in_flight.update(pending)
+            self.rays_cast += len(pending)
+        self.collect()
+
+    def collect(self):
+        # answers cast from an earlier player position are kept, they are at most AI_MAX_LATENCY ticks old
+        requests = []
+        for job, keys in self.requests:
+            visible = self.game.ai_workers.get(job)
+            if visible is None and job in self.game.ai_workers.jobs:
+                requests.append((job, keys))
+                continue
+            self.in_flight.difference_update(keys)
+            if visible is not None:
+                self.visible.update(zip(keys, visible))
+        self.requests = requests
+
+    def can_see(self, npc):
+        key = self.game.player.map_pos, npc.map_pos
+        if key not in self.visible:
+            if key in self.in_flight or key in self.deferred:
+                return npc.ray_cast_value  # the last answer until a cast for this tile arrives
+            self.visible[key] = self.cast(self.player_pos, [(npc.x, npc.y)], self.grid)[0]
+        return self.visible[key]
+
+    def cast(self, origin, positions, grid):
+        # a two-pass dda from the player towards each npc tile, horizontals then verticals, stepped for all rays at once
+        ox, oy = origin
+        x_map, y_map = int(ox), int(oy)
+        target = np.array(positions)
+        target_x, target_y = target[:, 0].astype(np.int64), target[:, 1].astype(np.int64)
+
+        angles = [math.atan2(y - oy, x - ox) for x, y in positions]
+        sin_a = np.array([math.sin(a) for a in angles])
+        cos_a = np.array([math.cos(a) for a in angles])
+        sin_a[sin_a == 0] = 1e-6
+
+        # horizontals
+        y_hor = np.where(sin_a > 0, y_map + 1, y_map - 1e-6)
+        dy = np.where(sin_a > 0, 1, -1)
+        depth_hor = (y_hor - oy) / sin_a
+        x_hor = ox + depth_hor * cos_a
+        delta_depth = dy / sin_a
+        player_dist_h, wall_dist_h = self.march(x_hor, y_hor, depth_hor, delta_depth * cos_a, dy, delta_depth,
+                                                target_x, target_y, grid)
+
+        # verticals
+        x_vert = np.where(cos_a > 0, x_map + 1, x_map - 1e-6)
+        dx = np.where(cos_a > 0, 1, -1)
+        depth_vert = (x_vert - ox) / cos_a
+        y_vert = oy + depth_vert * sin_a
+        delta_depth = dx / cos_a
+        player_dist_v, wall_dist_v = self.march(x_vert, y_vert, depth_vert, dx, delta_depth * sin_a, delta_depth,
+                                                target_x, target_y, grid)
+
+        player_dist = np.maximum(player_dist_v, player_dist_h)
+        wall_dist = np.maximum(wall_dist_v, wall_dist_h)
+        visible = ((0 < player_dist) & (player_dist < wall_dist)) | (wall_dist == 0)
+        visible |= (target_x == x_map) & (target_y == y_map)
+        return visible.tolist()
+
+    @staticmethod
+    def march(x, y, depth, dx, dy, delta_depth, target_x, target_y, grid):
+        # cumsum adds the steps in the same order as the scalar loop, so tiles match exactly
+        def steps(start, step):
+            values = np.empty((len(start), MAX_DEPTH))
+            values[:, 0] = start
+            values[:, 1:] = np.reshape(step, (-1, 1))
+            return np.cumsum(values, axis=1)
+
+        tile_x, tile_y = steps(x, dx).astype(np.int64), steps(y, dy).astype(np.int64)
+        depth = steps(depth, delta_depth)
+
+        rows, cols = grid.shape
+        inside = (tile_x >= 0) & (tile_x < cols) & (tile_y >= 0) & (tile_y < rows)
+        wall = inside & (grid[np.clip(tile_y, 0, rows - 1), np.clip(tile_x, 0, cols - 1)] != 0)
+        player = (tile_x == target_x[:, None]) & (tile_y == target_y[:, None])
+
+        hit = player | wall
+        first = np.argmax(hit, axis=1)
+        rays = np.arange(len(first))
+        hit_depth = np.where(hit[rays, first], depth[rays, first], 0)
+        player_hit = player[rays, first]
+        return np.where(player_hit, hit_depth, 0), np.where(player_hit, 0, hit_depth)
@@ -1,7 +1,9 @@
+import time
+START_TIME = time.perf_counter()  # the startup report counts from here
 import asyncio
+import importlib
 import pygame as pg
 import sys
-import time
 from settings import *
 from map import *
 from player import *
@@ -12,39 +14,44 @@ from object_handler import *
 from weapon import *
 from sound import *
 from pathfinding import *
-from aptos_sdk.account import Account
-from aptos_sdk.async_client import RestClient, FaucetClient
-from aptos_sdk.transactions import TransactionArgument, TransactionPayload, EntryFunction
-from aptos_sdk.bcs import Serializer
-from aptos_sdk.type_tag import TypeTag, StructTag
-from aptos_sdk.account_address import AccountAddress
+from line_of_sight import *
+from npc_storage import *
+from ai_workers import *
+from profiler import profiler, profile
+from assets import assets
 import hashlib
-import aiohttp
 import json
 
-NODE_URL = "https://fullnode.devnet.aptoslabs.com/v1"
-FAUCET_URL = "https://faucet.devnet.aptoslabs.com"
+profiler.record_startup('imports', START_TIME)
 
 class Game:
     def __init__(self):
+        start = time.perf_counter()
         pg.init()
         pg.mouse.set_visible(False)
         self.screen = pg.display.set_mode(RES)
         pg.event.set_grab(True)
         self.clock = pg.time.Clock()
-        self.delta_time = 1
+        self.delta_time = SIM_DT  # game logic always advances in fixed ticks
+        self.frame_time = 0
+        self.sim_time = 0
+        self.accumulator = 0
         self.global_trigger = False
-        self.global_event = pg.USEREVENT + 0
-        pg.time.set_timer(self.global_event, 40)
         self.state = 'LANDING'  # Start with the landing page
         self.font = pg.font.Font(None, 46)
         self.leaderboard = []
+        self.landing_image = None
+        self.leaderboard_image, self.leaderboard_key = None, None
+        self.menu_frame_key = None
+        self.screen_dirty = True
         self.game_ended = False
         self.show_disclaimer = False
         self.disclaimer_start_time = 0
-        self.new_game()
-        self.rest_client = RestClient(NODE_URL)
-        self.faucet_client = FaucetClient(FAUCET_URL, self.rest_client)
+        self.ai_workers = AIWorkerPool(AI_WORKERS)
+        self.map = None  # long-lived, see load_resources
+        self.round_ready = False
+        self.chain = None  # the blockchain module, imported on first use
+        self.rest_client, self.faucet_client = None, None
         self.contract_address = "0x69f9fa9f6cc6bf261b1b70900420526ee6df133e4156d55da1595d914064e3d4" 
         self.module_name = "leaderboard"
         self.score = 0
@@ -52,35 +59,114 @@ class Game:
         self.generate_wallet()
         self.game_end_triggered = False
         self.game_end_type = None
+        self.loading = asyncio.create_task(self.load_game())
+        profiler.record_startup('window', start)
 
     def generate_wallet(self):
-        self.account = Account.generate()
-        self.wallet_address = self.account.address()
-        print(f"Wallet created: {self.wallet_address}")
+        self.account, self.wallet_address = None, None
         asyncio.create_task(self.create_and_fund_account())
 
-    def new_game(self):
+    async def get_chain(self):
+        # the blockchain stack is imported on a worker thread so the landing page keeps running meanwhile
+        if self.chain is None:
+            start = time.perf_counter()
+            chain = await asyncio.to_thread(importlib.import_module, 'blockchain')
+            if self.chain is None:
+                self.chain = chain
+                self.rest_client = chain.RestClient(chain.NODE_URL)
+                self.faucet_client = chain.FaucetClient(chain.FAUCET_URL, self.rest_client)
+                profiler.record_startup('blockchain', start)
+        return self.chain
+
+    async def load_game(self):
+        # assets load in slices between landing page frames, then the round is built from the warm cache
+        start = time.perf_counter()
+        await assets.preload(ObjectRenderer.get_asset_requests(), assets.get_frame_dirs('resources/sprites'))
+        profiler.record_startup('assets', start)
+        start = time.perf_counter()
+        self.load_resources()
+        profiler.record_startup('resources', start)
+        start = time.perf_counter()
+        self.new_game()
+        profiler.record_startup('new_game', start)
+        print(profiler.get_startup_report())
+        print(assets.get_report(ASSET_REPORT_LINES))
+
+    def start_game(self, new_round=True):
+        if new_round or not self.round_ready:
+            self.loading.cancel()  # pressed before the preload finished, load what is left right now
+            self.new_game()
+        # menu time and the leaderboard fetch are not game time, the round starts with no backlog
+        self.accumulator, self.frame_time = 0, 0
+        self.state = 'GAME'
+        pg.mouse.set_visible(False)
+        pg.event.set_grab(True)
+        pg.mixer.music.play(-1)
+
+    def load_resources(self):
+        # built once per process: the level, textures, sounds and the objects holding them
         self.map = Map(self)
         self.player = Player(self)
         self.object_renderer = ObjectRenderer(self)
         self.raycasting = RayCasting(self)
-        self.object_handler = ObjectHandler(self)
         self.weapon = Weapon(self)
         self.sound = Sound(self)
+
+    def new_game(self):
+        # per-round state: the long-lived objects are reset, npcs and ai start over
+        self.ai_workers.clear()
+        # last round's objects read the map's navigation data, let them go before the map resets
+        self.object_handler = self.pathfinding = self.line_of_sight = None
+        if self.map is None:
+            self.load_resources()
+        self.map.reset()
+        self.player.reset()
+        self.weapon.reset()
+        self.raycasting.reset()
+        self.npc_storage = NPCStorage() if NPC_STATE == 'arrays' else None
+        self.object_handler = ObjectHandler(self)
         self.pathfinding = PathFinding(self)
+        self.line_of_sight = LineOfSight(self)
         pg.mixer.music.play(-1)
         self.score = 0
-        self.previous_npc_count = len(self.object_handler.npc_list)
+        self.game_ended = False
+        self.previous_npc_count = self.object_handler.alive_count
+        self.round_ready = True
+
+    def tick(self):
+        self.ai_workers.tick()
+        self.sim_time += SIM_DT
+        self.global_trigger = self.sim_time // GLOBAL_EVENT_TIME != (self.sim_time - SIM_DT) // GLOBAL_EVENT_TIME
+        self.player.update()
+        self.object_handler.update()
+        self.weapon.update()
+
+    def run_simulation(self):
+        # catch the simulation up with real time in fixed steps, then render in between
+        self.accumulator += self.frame_time
+        ticks = 0
+        while self.accumulator >= SIM_DT and ticks < MAX_TICKS_PER_FRAME:
+            self.tick()
+            self.accumulator -= SIM_DT
+            ticks += 1
+            if self.game_end_triggered or not self.object_handler.alive_count:
+                # the round is over and the end screens block, their time is not caught up afterwards
+                self.accumulator = 0
+                break
+        if ticks == MAX_TICKS_PER_FRAME:
+            self.accumulator %= SIM_DT
+        return self.accumulator / SIM_DT
 
+    @profile('Game.update')
     async def update(self):
         if self.state == 'GAME':
-            self.player.update()
+            alpha = self.run_simulation()
+            self.player.interpolate(alpha)
             self.raycasting.update()
-            self.object_handler.update()
-            self.weapon.update()
-            
+            self.object_handler.project_sprites(alpha)
+
             # Check if NPCs have been killed
-            current_npc_count = len([npc for npc in self.object_handler.npc_list if npc.alive])
+            current_npc_count = self.object_handler.alive_count
             if current_npc_count < self.previous_npc_count:
                 npcs_killed = self.previous_npc_count - current_npc_count
                 self.increment_score(npcs_killed * 10)  
@@ -95,85 +181,106 @@ class Game:
                 self.show_disclaimer = False
                 self.state = 'LEADERBOARD'
         
-        pg.display.flip()
-        self.delta_time = self.clock.tick(FPS)
+        if self.screen_dirty:
+            pg.display.flip()
+            self.screen_dirty = False
+        self.frame_time = self.clock.tick(FPS if self.state == 'GAME' else MENU_FPS)
         pg.display.set_caption(f'{self.clock.get_fps() :.1f}')
 
+    @profile('Game.draw')
     def draw(self):
-        if self.state == 'LANDING':
-            self.draw_landing()
-        elif self.state == 'LEADERBOARD':
-            self.draw_leaderboard()
-        elif self.state == 'GAME':
+        if self.state == 'GAME':
             self.object_renderer.draw()
             self.weapon.draw()
-        
+            if self.show_disclaimer:
+                self.object_renderer.game_over()
+            self.menu_frame_key = None
+            self.screen_dirty = True
+        else:
+            self.draw_menu()
+        profiler.draw(self.screen)
+
+    def draw_menu(self):
+        # menus are static: redraw and flip only when the composed screen changes
+        if self.state == 'LANDING':
+            menu_image = self.get_landing_image()
+        else:
+            menu_image = self.get_leaderboard_image()
+        frame_key = menu_image, self.show_disclaimer, profiler.overlay
+        if frame_key == self.menu_frame_key and not profiler.overlay:
+            return
+        self.screen.blit(menu_image, (0, 0))
         if self.show_disclaimer:
             self.object_renderer.game_over()
+        self.menu_frame_key = frame_key
+        self.screen_dirty = True
 
-    def draw_landing(self):
-        self.screen.fill((0, 0, 0))
-        title = self.font.render('Welcome to Ben-Ton', True, (255, 255, 255))
-        start_text = self.font.render('Press SPACE to Start', True, (255, 255, 255))
-        leaderboard_text = self.font.render('Press L for Leaderboard', True, (255, 255, 255))
-        self.screen.blit(title, (WIDTH // 2 - title.get_width() // 2, HEIGHT // 4))
-        self.screen.blit(start_text, (WIDTH // 2 - start_text.get_width() // 2, HEIGHT // 2))
-        self.screen.blit(leaderboard_text, (WIDTH // 2 - leaderboard_text.get_width() // 2, HEIGHT // 2 + 50))
+    def get_landing_image(self):
+        if self.landing_image is None:
+            image = pg.Surface(RES)
+            title = self.font.render('Welcome to Ben-Ton', True, (255, 255, 255))
+            start_text = self.font.render('Press SPACE to Start', True, (255, 255, 255))
+            leaderboard_text = self.font.render('Press L for Leaderboard', True, (255, 255, 255))
+            image.blit(title, (WIDTH // 2 - title.get_width() // 2, HEIGHT // 4))
+            image.blit(start_text, (WIDTH // 2 - start_text.get_width() // 2, HEIGHT // 2))
+            image.blit(leaderboard_text, (WIDTH // 2 - leaderboard_text.get_width() // 2, HEIGHT // 2 + 50))
+            self.landing_image = image
+        return self.landing_image
 
-    def draw_leaderboard(self):
-        self.screen.fill((0, 0, 0))
-        title = self.font.render('Leaderboard', True, (255, 255, 255))
-        self.screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 50))
-        for i, entry in enumerate(self.leaderboard):
-            address, score = entry
-            text = self.font.render(f"{i+1}. {address[:10]}... : {score}", True, (255, 255, 255))
-            self.screen.blit(text, (WIDTH // 2 - text.get_width() // 2, 100 + i * 40))
-        back_text = self.font.render('Press B to go back', True, (255, 255, 255))
-        self.screen.blit(back_text, (WIDTH // 2 - back_text.get_width() // 2, HEIGHT - 100))
-        replay_text = self.font.render('Press SPACE to replay', True, (255, 255, 255))
-        self.screen.blit(replay_text, (WIDTH // 2 - replay_text.get_width() // 2, HEIGHT - 50))
+    def get_leaderboard_image(self):
+        leaderboard_key = tuple(self.leaderboard)
+        if leaderboard_key != self.leaderboard_key:
+            image = pg.Surface(RES)
+            title = self.font.render('Leaderboard', True, (255, 255, 255))
+            image.blit(title, (WIDTH // 2 - title.get_width() // 2, 50))
+            for i, entry in enumerate(self.leaderboard):
+                address, score = entry
+                text = self.font.render(f"{i+1}. {address[:10]}... : {score}", True, (255, 255, 255))
+                image.blit(text, (WIDTH // 2 - text.get_width() // 2, 100 + i * 40))
+            back_text = self.font.render('Press B to go back', True, (255, 255, 255))
+            image.blit(back_text, (WIDTH // 2 - back_text.get_width() // 2, HEIGHT - 100))
+            replay_text = self.font.render('Press SPACE to replay', True, (255, 255, 255))
+            image.blit(replay_text, (WIDTH // 2 - replay_text.get_width() // 2, HEIGHT - 50))
+            self.leaderboard_image, self.leaderboard_key = image, leaderboard_key
+        return self.leaderboard_image
 
     def check_events(self):
-        self.global_trigger = False
         for event in pg.event.get():
             if event.type == pg.QUIT or (event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE):
                 pg.quit()
                 sys.exit()
-            elif event.type == self.global_event:
-                self.global_trigger = True
+            elif event.type == pg.KEYDOWN and event.key == pg.K_F3:
+                profiler.toggle_overlay()
+            elif event.type == pg.KEYDOWN and event.key == pg.K_F4:
+                profiler.dump()
             elif event.type == pg.KEYDOWN:
                 if self.state == 'LANDING':
                     if event.key == pg.K_SPACE:
-                        self.state = 'GAME'
-                        pg.mouse.set_visible(False)
-                        pg.event.set_grab(True)
-                        pg.mixer.music.play(-1)
+                        self.start_game(new_round=False)
                     elif event.key == pg.K_l:
                         self.state = 'LEADERBOARD'
                 elif self.state == 'LEADERBOARD':
                     if event.key == pg.K_b:
                         self.state = 'LANDING'
                     elif event.key == pg.K_SPACE:
-                        self.new_game()
-                        self.state = 'GAME'
-                        pg.mouse.set_visible(False)
-                        pg.event.set_grab(True)
-                        pg.mixer.music.play(-1)
-            self.player.single_fire_event(event)
+                        self.start_game()
+            if self.state == 'GAME':
+                self.player.single_fire_event(event)
 
     async def update_score(self):
         max_retries = 3
         print(self)
         for attempt in range(max_retries):
             try:
-                payload = EntryFunction.natural(
+                chain = await self.get_chain()
+                payload = chain.EntryFunction.natural(
                     f"{self.contract_address}::{self.module_name}",
                     "update_score",
                     [],  # No type arguments needed
-                    [TransactionArgument(self.score, Serializer.u64)],
+                    [chain.TransactionArgument(self.score, chain.Serializer.u64)],
                 )
                 signed_transaction = await self.rest_client.create_bcs_signed_transaction(
-                    self.account, TransactionPayload(payload)
+                    self.account, chain.TransactionPayload(payload)
                 )
                 txn_hash = await self.rest_client.submit_bcs_transaction(signed_transaction)
                 await self.rest_client.wait_for_transaction(txn_hash)
@@ -188,6 +295,7 @@ class Game:
 
     async def fetch_leaderboard(self):
         try:
+            chain = await self.get_chain()
             url = f"{self.rest_client.base_url}/view"
             payload = {
                 "function": f"{self.contract_address}::{self.module_name}::get_top_players",
@@ -195,7 +303,7 @@ class Game:
                 "arguments": []
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with chain.aiohttp.ClientSession() as session:
                 async with session.post(url, json=payload) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -212,6 +320,7 @@ class Game:
 
     async def get_player_score(self, player_address):
         try:
+            chain = await self.get_chain()
             url = f"{self.rest_client.base_url}/view"
             payload = {
                 "function": f"{self.contract_address}::{self.module_name}::get_player_score",
@@ -219,7 +328,7 @@ class Game:
                 "arguments": [player_address]
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with chain.aiohttp.ClientSession() as session:
                 async with session.post(url, json=payload) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -249,6 +358,10 @@ class Game:
 
     async def create_and_fund_account(self):
         try:
+            chain = await self.get_chain()
+            self.account = chain.Account.generate()
+            self.wallet_address = self.account.address()
+            print(f"Wallet created: {self.wallet_address}")
             # Fund the account using faucet
             await self.faucet_client.fund_account(self.account.address(), 100_000_000)  # 1 APT
             print(f"Account funded: {self.account.address()}")
@@ -287,12 +400,17 @@ class Game:
 
 async def main():
     game = Game()
+    game.draw()  # the landing page goes up before anything else loads
+    pg.display.flip()
+    profiler.record_startup('first frame', START_TIME)
     while True:
         game.check_events()
         await game.update()
         game.draw()
         if game.state == 'LEADERBOARD':
             await game.fetch_leaderboard()
+        profiler.end_frame()
         await asyncio.sleep(0)
 
-asyncio.run(main())
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,4 +1,7 @@
 import pygame as pg
+import numpy as np
+from map_file import load_map, NavGraph
+from settings import *
 
 _ = False
 mini_map = [
@@ -38,13 +41,46 @@ mini_map = [
 
 
 class Map:
-    def __init__(self, game):
+    def __init__(self, game, path=MAP_FILE):
         self.game = game
-        self.mini_map = mini_map
+        self.path = path
+        self.version = 0  # bumped on every tile change so navigation data can go stale
+        self.nav, self.nav_graph, self.nav_buffer = None, None, None
+        self.load()
+
+    def load(self):
+        self.close_nav()
+        if self.path:
+            self.mini_map, self.nav = load_map(self.path)
+        else:
+            self.mini_map, self.nav = [row[:] for row in mini_map], None
         self.world_map = {}
         self.rows = len(self.mini_map)
         self.cols = len(self.mini_map[0])
         self.get_map()
+        self.tiles = self.get_tiles()
+        self.grid = self.get_grid()
+        self.loaded_version = self.version
+        self.nav_graph = NavGraph(self.nav) if self.nav is not None else None
+        self.nav_buffer = self.nav.buffer if self.nav is not None else None
+
+    def close_nav(self):
+        # release the graph's views and unmap the sidecar
+        if self.nav_graph is not None:
+            self.nav_graph.release()
+        buffer = self.nav_buffer
+        self.nav, self.nav_graph, self.nav_buffer = None, None, None
+        if buffer is not None:
+            try:
+                buffer.close()
+            except BufferError:
+                pass  # numpy views still held elsewhere keep it mapped until they go
+
+    def reset(self):
+        # a round that changed tiles gets the level back, the version moves past its edits
+        if self.version != self.loaded_version:
+            self.version += 1
+            self.load()
 
     def get_map(self):
         for j, row in enumerate(self.mini_map):
@@ -52,6 +88,35 @@ class Map:
                 if value:
                     self.world_map[(i, j)] = value
 
+    def get_tiles(self):
+        # canonical row-major tile values, 0 is floor
+        if self.nav is not None:
+            return bytearray(self.nav.tiles)
+        return bytearray(value or 0 for row in self.mini_map for value in row)
+
+    def get_grid(self):
+        # [row, col] numpy view sharing memory with tiles, for the vectorized casters
+        return np.frombuffer(self.tiles, dtype=np.uint8).reshape(self.rows, self.cols)
+
+    def get_tile(self, x, y):
+        # 0 outside the map, like a missing world_map key
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            return self.tiles[y * self.cols + x]
+        return 0
+
+    def is_wall(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows and self.tiles[y * self.cols + x] != 0
+
+    def set_tile(self, x, y, value):
+        self.mini_map[y][x] = value
+        if value:
+            self.world_map[(x, y)] = value
+        else:
+            self.world_map.pop((x, y), None)
+        self.tiles[y * self.cols + x] = value or 0
+        self.nav = None  # precomputed navigation no longer matches, its graph is released on the next load
+        self.version += 1
+
     def draw(self):
         [pg.draw.rect(self.game.screen, 'darkgray', (pos[0] * 100, pos[1] * 100, 100, 100), 2)
          for pos in self.world_map]
\ No newline at end of file
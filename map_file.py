@@ -0,0 +1,135 @@
+import hashlib
+import mmap
+import os
+import struct
+from collections import namedtuple
+from collections.abc import Mapping
+import numpy as np
+
+# the sidecar next to a map file: header, then the tile grid, walkable cells, the navigation graph as CSR
+# and each tile's cell number
+NAV_MAGIC = b'BENTONAV'
+NAV_VERSION = 2
+NAV_HEADER = struct.Struct('<8sI20sIIII')  # magic, version, sha1 of the map file, rows, cols, cells, edges
+NAV_WAYS = (-1, 0), (0, -1), (1, 0), (0, 1), (-1, -1), (1, -1), (1, 1), (-1, 1)  # PathFinding.ways order
+
+# uint8 [row, col], int32 (x, y), int32, int32, int32 [row, col] with -1 on walls, the mmap the arrays view
+NavData = namedtuple('NavData', 'tiles cells offsets edges index buffer', defaults=(None,))
+
+
+class NavGraph(Mapping):
+    # the sidecar's adjacency read in place, only the cells a search reaches are decoded into lists
+    def __init__(self, nav):
+        self.rows, self.cols = nav.index.shape
+        # memoryviews index the mapped arrays as plain ints, much cheaper than numpy scalars
+        self.index = memoryview(nav.index.reshape(-1))
+        self.cells = memoryview(nav.cells.reshape(-1))
+        self.offsets, self.edges = memoryview(nav.offsets), memoryview(nav.edges)
+        self.next_nodes = {}
+
+    def __getitem__(self, cell):
+        next_nodes = self.next_nodes.get(cell)
+        if next_nodes is None:
+            if cell not in self:
+                raise KeyError(cell)
+            i = self.index[cell[1] * self.cols + cell[0]]
+            cells = self.cells
+            next_nodes = [(cells[2 * j], cells[2 * j + 1]) for j in self.edges[self.offsets[i]:self.offsets[i + 1]]]
+            self.next_nodes[cell] = next_nodes
+        return next_nodes
+
+    def get(self, cell, default=None):
+        return self[cell] if cell in self else default
+
+    def __contains__(self, cell):
+        x, y = cell
+        return 0 <= x < self.cols and 0 <= y < self.rows and self.index[y * self.cols + x] >= 0
+
+    def __iter__(self):
+        cells = self.cells
+        return ((cells[i], cells[i + 1]) for i in range(0, len(cells), 2))
+
+    def __len__(self):
+        return len(self.cells) // 2
+
+    def release(self):
+        # let go of the mapped arrays so the sidecar can be unmapped, the graph is unusable afterwards
+        for view in (self.index, self.cells, self.offsets, self.edges):
+            view.release()
+        self.next_nodes = {}
+
+
+def read_map(path):
+    # one row per line, '.' is floor and 1-9 are wall textures
+    with open(path, 'rb') as file:
+        source = file.read()
+    mini_map = [[int(char) if char.isdigit() else False for char in line.strip()]
+                for line in source.decode().splitlines() if line.strip()]
+    return mini_map, hashlib.sha1(source).digest()
+
+
+def get_nav_data(grid):
+    # walkable cells in row-major order, each linked to its open 8-way neighbours in PathFinding.ways order
+    rows, cols = grid.shape
+    index = np.full((rows + 2, cols + 2), -1, dtype=np.int32)
+    cell_y, cell_x = np.nonzero(grid == 0)
+    index[cell_y + 1, cell_x + 1] = np.arange(len(cell_y), dtype=np.int32)
+    neighbours = np.stack([index[cell_y + 1 + dy, cell_x + 1 + dx] for dx, dy in NAV_WAYS], axis=1)
+    linked = neighbours >= 0
+    offsets = np.zeros(len(cell_y) + 1, dtype=np.int32)
+    np.cumsum(linked.sum(axis=1), out=offsets[1:])
+    cells = np.column_stack((cell_x, cell_y)).astype(np.int32)
+    return NavData(grid, cells, offsets, neighbours[linked].astype(np.int32), index[1:-1, 1:-1].copy())
+
+
+def write_nav(path, digest, nav):
+    rows, cols = nav.tiles.shape
+    header = NAV_HEADER.pack(NAV_MAGIC, NAV_VERSION, digest, rows, cols, len(nav.cells), len(nav.edges))
+    tiles = nav.tiles.tobytes()
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(header + tiles + bytes(-len(tiles) % 4))  # keep the int32 arrays aligned
+        for array in (nav.cells, nav.offsets, nav.edges, nav.index):
+            file.write(array.astype('<i4').tobytes())
+    os.replace(temp_path, path)
+
+
+def read_nav(path, digest):
+    # arrays are views on a read-only memory map, None when the sidecar is missing or stale
+    try:
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(buffer) < NAV_HEADER.size:
+        buffer.close()
+        return None
+    magic, version, nav_digest, rows, cols, cells, edges = NAV_HEADER.unpack_from(buffer)
+    tiles_size = rows * cols + (-(rows * cols) % 4)
+    size = NAV_HEADER.size + tiles_size + 4 * (cells * 2 + cells + 1 + edges + rows * cols)
+    if (magic, version, nav_digest) != (NAV_MAGIC, NAV_VERSION, digest) or len(buffer) < size:
+        buffer.close()  # stale, or cut short by a crash or a full disk while it was written
+        return None
+    offset = NAV_HEADER.size
+    tiles = np.frombuffer(buffer, np.uint8, rows * cols, offset).reshape(rows, cols)
+    offset += tiles_size
+    arrays = []
+    for count in (cells * 2, cells + 1, edges, rows * cols):
+        arrays.append(np.frombuffer(buffer, '<i4', count, offset))
+        offset += count * 4
+    return NavData(tiles, arrays[0].reshape(cells, 2), arrays[1], arrays[2], arrays[3].reshape(rows, cols), buffer)
+
+
+def load_map(path):
+    # the map's rows plus its navigation data, from the sidecar when it matches the map file
+    mini_map, digest = read_map(path)
+    nav_path = path + '.nav'
+    nav = read_nav(nav_path, digest)
+    if nav is None:
+        grid = np.array([[value or 0 for value in row] for row in mini_map], dtype=np.uint8)
+        nav = get_nav_data(grid)
+        try:
+            write_nav(nav_path, digest, nav)
+        except OSError:
+            pass  # read-only install, the data is just rebuilt next time
+    return mini_map, nav
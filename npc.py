@@ -1,10 +1,15 @@
 from sprite_object import *
 from random import randint, random
+from npc_storage import NPCStorage, StorageField
 
 
 class NPC(AnimatedSprite):
+    storage = None
+
     def __init__(self, game, path='resources/sprites/npc/soldier/0.png', pos=(10.5, 5.5),
                  scale=0.6, shift=0.38, animation_time=180):
+        if NPC_STATE == 'arrays':
+            self.storage, self.slot = game.npc_storage, game.npc_storage.allocate()
         super().__init__(game, path, pos, scale, shift, animation_time)
         self.attack_images = self.get_images(self.path + '/attack')
         self.death_images = self.get_images(self.path + '/death')
@@ -23,15 +28,29 @@ class NPC(AnimatedSprite):
         self.ray_cast_value = False
         self.frame_counter = 0
         self.player_search_trigger = False
+        self.next_pos = None
+        self.prev_x, self.prev_y = self.x, self.y
 
     def update(self):
+        self.prev_x, self.prev_y = self.x, self.y
         self.check_animation_time()
-        self.get_sprite()
+        self.locate_player()
         self.run_logic()
-        # self.draw_ray_cast()
+
+    def locate_player(self):
+        # direction and distance to the player in simulation space, for the AI
+        if self.storage is not None:
+            return  # already batched by NPCStorage.locate
+        dx, dy = self.x - self.game.player.x, self.y - self.game.player.y
+        self.theta = math.atan2(dy, dx)
+        self.dist = math.hypot(dx, dy)
+
+    def interpolate(self, alpha):
+        self.render_x = self.prev_x + (self.x - self.prev_x) * alpha
+        self.render_y = self.prev_y + (self.y - self.prev_y) * alpha
 
     def check_wall(self, x, y):
-        return (x, y) not in self.game.map.world_map
+        return not self.game.map.is_wall(x, y)
 
     def check_wall_collision(self, dx, dy):
         if self.check_wall(int(self.x + dx * self.size), int(self.y)):
@@ -41,10 +60,17 @@ class NPC(AnimatedSprite):
 
     def movement(self):
         next_pos = self.game.pathfinding.get_path(self.map_pos, self.game.player.map_pos)
+        if next_pos is None:  # over this tick's search quota
+            next_pos = self.next_pos or self.game.player.map_pos
+        self.next_pos = next_pos
         next_x, next_y = next_pos
 
         # pg.draw.rect(self.game.screen, 'blue', (100 * next_x, 100 * next_y, 100, 100))
         if next_pos not in self.game.object_handler.npc_positions:
+            if self.storage is not None:
+                # stepped for all npcs at once by NPCStorage.move
+                self.target_x, self.target_y, self.moving = next_x + 0.5, next_y + 0.5, True
+                return
             angle = math.atan2(next_y + 0.5 - self.y, next_x + 0.5 - self.x)
             dx = math.cos(angle) * self.speed
             dy = math.sin(angle) * self.speed
@@ -68,14 +94,11 @@ class NPC(AnimatedSprite):
         if self.animation_trigger:
             self.pain = False
 
-    def check_hit_in_npc(self):
-        if self.ray_cast_value and self.game.player.shot:
-            if HALF_WIDTH - self.sprite_half_width < self.screen_x < HALF_WIDTH + self.sprite_half_width:
-                self.game.sound.npc_pain.play()
-                self.game.player.shot = False
-                self.pain = True
-                self.health -= self.game.weapon.damage
-                self.check_health()
+    def get_damage(self, damage):
+        self.game.sound.npc_pain.play()
+        self.pain = True
+        self.health -= damage
+        self.check_health()
 
     def check_health(self):
         if self.health < 1:
@@ -84,8 +107,7 @@ class NPC(AnimatedSprite):
 
     def run_logic(self):
         if self.alive:
-            self.ray_cast_value = self.ray_cast_player_npc()
-            self.check_hit_in_npc()
+            self.ray_cast_value = self.game.line_of_sight.can_see(self)
 
             if self.pain:
                 self.animate_pain()
@@ -113,75 +135,10 @@ class NPC(AnimatedSprite):
     def map_pos(self):
         return int(self.x), int(self.y)
 
-    def ray_cast_player_npc(self):
-        if self.game.player.map_pos == self.map_pos:
-            return True
-
-        wall_dist_v, wall_dist_h = 0, 0
-        player_dist_v, player_dist_h = 0, 0
-
-        ox, oy = self.game.player.pos
-        x_map, y_map = self.game.player.map_pos
-
-        ray_angle = self.theta
-
-        sin_a = math.sin(ray_angle)
-        cos_a = math.cos(ray_angle)
-
-        # horizontals
-        y_hor, dy = (y_map + 1, 1) if sin_a > 0 else (y_map - 1e-6, -1)
-
-        depth_hor = (y_hor - oy) / sin_a
-        x_hor = ox + depth_hor * cos_a
-
-        delta_depth = dy / sin_a
-        dx = delta_depth * cos_a
-
-        for i in range(MAX_DEPTH):
-            tile_hor = int(x_hor), int(y_hor)
-            if tile_hor == self.map_pos:
-                player_dist_h = depth_hor
-                break
-            if tile_hor in self.game.map.world_map:
-                wall_dist_h = depth_hor
-                break
-            x_hor += dx
-            y_hor += dy
-            depth_hor += delta_depth
-
-        # verticals
-        x_vert, dx = (x_map + 1, 1) if cos_a > 0 else (x_map - 1e-6, -1)
-
-        depth_vert = (x_vert - ox) / cos_a
-        y_vert = oy + depth_vert * sin_a
-
-        delta_depth = dx / cos_a
-        dy = delta_depth * sin_a
-
-        for i in range(MAX_DEPTH):
-            tile_vert = int(x_vert), int(y_vert)
-            if tile_vert == self.map_pos:
-                player_dist_v = depth_vert
-                break
-            if tile_vert in self.game.map.world_map:
-                wall_dist_v = depth_vert
-                break
-            x_vert += dx
-            y_vert += dy
-            depth_vert += delta_depth
-
-        player_dist = max(player_dist_v, player_dist_h)
-        wall_dist = max(wall_dist_v, wall_dist_h)
-
-        if 0 < player_dist < wall_dist or not wall_dist:
-            return True
-        return False
-
-    def draw_ray_cast(self):
-        pg.draw.circle(self.game.screen, 'red', (100 * self.x, 100 * self.y), 15)
-        if self.ray_cast_player_npc():
-            pg.draw.line(self.game.screen, 'orange', (100 * self.game.player.x, 100 * self.game.player.y),
-                         (100 * self.x, 100 * self.y), 2)
+
+if NPC_STATE == 'arrays':
+    for name in NPCStorage.fields:
+        setattr(NPC, name, StorageField(name))
 
 
 class SoldierNPC(NPC):
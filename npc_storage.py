@@ -0,0 +1,73 @@
+import numpy as np
+from settings import *
+
+
+class NPCStorage:
+    # core npc state as parallel arrays, one slot per npc, so hordes locate and move in a few numpy calls
+    fields = {'x': float, 'y': float, 'prev_x': float, 'prev_y': float, 'theta': float, 'dist': float,
+              'health': float, 'speed': float, 'size': float, 'alive': bool, 'pain': bool,
+              'player_search_trigger': bool, 'target_x': float, 'target_y': float, 'moving': bool}
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.views = {}  # memoryviews hand single slots to python as plain floats and bools
+        for name, dtype in self.fields.items():
+            setattr(self, name, np.zeros(capacity, dtype))
+            self.views[name] = memoryview(getattr(self, name))
+
+    def allocate(self):
+        if self.count == len(self.x):
+            for name in self.fields:
+                array = getattr(self, name)
+                setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+                self.views[name] = memoryview(getattr(self, name))
+        self.count += 1
+        return self.count - 1
+
+    def locate(self, player_x, player_y):
+        # batched NPC.locate_player
+        dx, dy = self.x[:self.count] - player_x, self.y[:self.count] - player_y
+        self.theta[:self.count] = np.arctan2(dy, dx)
+        self.dist[:self.count] = np.hypot(dx, dy)
+
+    def get_intervals(self):
+        # batched AIScheduler.get_interval, dist is fresh from locate
+        count = self.count
+        full_rate = ~self.alive[:count] | self.pain[:count] | self.player_search_trigger[:count]
+        near = self.dist[:count] < AI_NEAR_DIST
+        return np.where(full_rate, 1, np.where(near, AI_IDLE_INTERVAL, AI_FAR_INTERVAL)).tolist()
+
+    def move(self, grid):
+        # batched NPC.check_wall_collision for every npc that picked a step this tick
+        slots = np.flatnonzero(self.moving[:self.count])
+        if not len(slots):
+            return
+        x, y, speed, size = self.x[slots], self.y[slots], self.speed[slots], self.size[slots]
+        angle = np.arctan2(self.target_y[slots] - y, self.target_x[slots] - x)
+        dx, dy = np.cos(angle) * speed, np.sin(angle) * speed
+
+        x = np.where(self.is_wall(grid, x + dx * size, y), x, x + dx)
+        y = np.where(self.is_wall(grid, x, y + dy * size), y, y + dy)
+        self.x[slots], self.y[slots] = x, y
+        self.moving[slots] = False
+
+    @staticmethod
+    def is_wall(grid, x, y):
+        rows, cols = grid.shape
+        tile_x, tile_y = x.astype(np.int64), y.astype(np.int64)
+        inside = (tile_x >= 0) & (tile_x < cols) & (tile_y >= 0) & (tile_y < rows)
+        return inside & (grid[np.clip(tile_y, 0, rows - 1), np.clip(tile_x, 0, cols - 1)] != 0)
+
+
+class StorageField:
+    # attribute backed by this npc's slot in its NPCStorage
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, npc, owner=None):
+        if npc is None:
+            return self
+        return npc.storage.views[self.name][npc.slot]
+
+    def __set__(self, npc, value):
+        npc.storage.views[self.name][npc.slot] = value
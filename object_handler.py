@@ -1,6 +1,12 @@
+import time
 from sprite_object import *
 from npc import *
-from random import choices, randrange
+from random import choices
+from spatial_index import SpatialIndex
+from ai_scheduler import AIScheduler
+from spawn_index import SpawnIndex
+from chunks import ChunkManager
+from profiler import profiler, profile
 
 
 class ObjectHandler:
@@ -8,18 +14,24 @@ class ObjectHandler:
         self.game = game
         self.sprite_list = []
         self.npc_list = []
+        self.sprite_index = SpatialIndex()
+        self.npc_index = SpatialIndex()  # living npcs only
+        self.sprite_chunks = ChunkManager()
+        self.npc_chunks = ChunkManager()
+        self.ai_scheduler = AIScheduler(game)
         self.npc_sprite_path = 'resources/sprites/npc/'
         self.static_sprite_path = 'resources/sprites/static_sprites/'
         self.anim_sprite_path = 'resources/sprites/animated_sprites/'
         add_sprite = self.add_sprite
         add_npc = self.add_npc
-        self.npc_positions = {}
 
         # spawn npc
         self.enemies = 20  # npc count
         self.npc_types = [SoldierNPC, CacoDemonNPC, CyberDemonNPC]
         self.weights = [70, 20, 10]
-        self.restricted_area = {(i, j) for i in range(10) for j in range(10)}
+        self.spawn_exclusions = [(0, 0, 10, 10)]  # (x0, y0, x1, y1), keeps the player's start clear
+        self.spawn_regions = []  # ((x0, y0, x1, y1), weight)
+        self.spawn_index = SpawnIndex(game.map)
         self.spawn_npc()
 
         # sprite map
@@ -57,31 +69,100 @@ class ObjectHandler:
         # add_npc(CyberDemonNPC(game, pos=(14.5, 25.5)))
 
     def spawn_npc(self):
-        for i in range(self.enemies):
+        cells = self.spawn_index.sample(self.enemies, self.spawn_exclusions, self.spawn_regions, self.npc_positions)
+        for x, y in cells:
             npc = choices(self.npc_types, self.weights)[0]
-            pos = x, y = randrange(self.game.map.cols), randrange(self.game.map.rows)
-            while (pos in self.game.map.world_map) or (pos in self.restricted_area):
-                pos = x, y = randrange(self.game.map.cols), randrange(self.game.map.rows)
             self.add_npc(npc(self.game, pos=(x + 0.5, y + 0.5)))
 
+    @property
+    def npc_positions(self):
+        return self.npc_index.occupied
+
+    @property
+    def alive_count(self):
+        return len(self.npc_index)
+
     def check_win(self):
-        if not len(self.npc_positions):
+        if not self.alive_count and not self.game.game_end_triggered:
             self.game.object_renderer.win()
             pg.display.flip()
             pg.time.delay(1500)
             self.game.game_over()  # Call game_over instead of new_game
 
+    @profile('ObjectHandler.update')
     def update(self):
-        previous_npc_count = len(self.npc_positions)
-        self.npc_positions = {npc.map_pos for npc in self.npc_list if npc.alive}
-        current_npc_count = len(self.npc_positions) 
+        player = self.game.player
+        self.sprite_chunks.update(player.x, player.y)
+        self.npc_chunks.update(player.x, player.y)
+        storage = self.game.npc_storage
+        if storage is not None:
+            storage.locate(self.game.player.x, self.game.player.y)
+        if self.game.player.shot:
+            self.resolve_shot()
+        full_rate, reduced_rate = self.ai_scheduler.schedule(self.npc_chunks.active)
+        self.game.line_of_sight.update(full_rate + reduced_rate)
+
+        [sprite.update() for sprite in self.sprite_chunks.active]
+        start = time.perf_counter()
+        [npc.update() for npc in full_rate]
+        full_rate_end = time.perf_counter()
+        [npc.update() for npc in reduced_rate]
+        self.ai_scheduler.record(full_rate_end - start, len(reduced_rate), time.perf_counter() - full_rate_end)
+        self.game.pathfinding.record_stats()
 
-        [sprite.update() for sprite in self.sprite_list]
-        [npc.update() for npc in self.npc_list]
+        if storage is not None:
+            storage.move(self.game.map.grid)
+        [self.track_npc(npc) for npc in full_rate + reduced_rate]
         self.check_win()
 
+    def resolve_shot(self):
+        # once per shot: the nearest npc whose last projected sprite covers the crosshair in front of the walls
+        raycasting = self.game.raycasting
+        if not raycasting.ray_casting_result:
+            return
+        wall_depth = raycasting.depth_buffer[HALF_NUM_RAYS]
+        player = self.game.player
+        target = None
+        # nothing behind the wall can be hit, an npc covering the crosshair is within HALF_FOV of it
+        radius = wall_depth / math.cos(HALF_FOV)
+        for npc in self.npc_index.get_in_view(player.render_x, player.render_y, player.render_angle, 0, radius):
+            if not self.npc_chunks.is_active(npc) or not 0.5 < npc.norm_dist < wall_depth:
+                continue
+            half_width = SCREEN_DIST / npc.norm_dist * npc.SPRITE_SCALE * npc.IMAGE_RATIO // 2
+            if abs(npc.screen_x - HALF_WIDTH) < half_width and (target is None or npc.norm_dist < target.norm_dist):
+                target = npc
+        if target is not None:
+            player.shot = False
+            target.get_damage(self.game.weapon.damage)
+
+    def track_npc(self, npc):
+        if npc.alive:
+            self.npc_index.move(npc)
+            self.npc_chunks.move(npc)
+        elif npc in self.npc_index:
+            self.npc_index.remove(npc)
+
+    @profile('ObjectHandler.project_sprites')
+    def project_sprites(self, alpha):
+        # per rendered frame: place sprites between their last two simulated positions
+        npcs = self.npc_chunks.active
+        for npc in npcs:
+            npc.interpolate(alpha)
+        player = self.game.player
+        sprites = self.sprite_index.get_in_view(player.render_x, player.render_y, player.render_angle, FOV,
+                                                CHUNK_RADIUS * CHUNK_SIZE)
+        [sprite.get_sprite() for sprite in sprites]
+        [npc.get_sprite() for npc in npcs]
+        profiler.count('sprites drawn', self.game.raycasting.sprites_drawn)
+        profiler.count('sprites culled', self.game.raycasting.sprites_culled)
+
     def add_npc(self, npc):
         self.npc_list.append(npc)
+        self.npc_chunks.add(npc)
+        if npc.alive:
+            self.npc_index.add(npc)
 
     def add_sprite(self, sprite):
         self.sprite_list.append(sprite)
+        self.sprite_index.add(sprite)
+        self.sprite_chunks.add(sprite)
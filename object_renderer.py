@@ -1,8 +1,13 @@
 import pygame as pg
+import numpy as np
 from settings import *
+from assets import assets
+from profiler import profile
 
 
 class ObjectRenderer:
+    digit_size = 90
+
     def __init__(self, game):
         self.game = game
         self.screen = game.screen
@@ -10,13 +15,18 @@ class ObjectRenderer:
         self.sky_image = self.get_texture('resources/textures/sky.png', (WIDTH, HALF_HEIGHT))
         self.sky_offset = 0
         self.blood_screen = self.get_texture('resources/textures/blood_screen.png', RES)
-        self.digit_size = 90
         self.digit_images = [self.get_texture(f'resources/textures/digits/{i}.png', [self.digit_size] * 2)
                              for i in range(11)]
         self.digits = dict(zip(map(str, range(11)), self.digit_images))
+        self.health_image, self.health_value = None, None
+        self.score_image, self.score_value = None, None
         self.game_over_image = self.get_texture('resources/textures/game_over.png', RES)
         self.win_image = self.get_texture('resources/textures/win.png', RES)
+        if RENDER_MODE == 'framebuffer':
+            self.wall_pixels = self.get_wall_pixels()
+            self.screen_rows = np.arange(HEIGHT, dtype=np.float32) - HALF_HEIGHT + 0.5
 
+    @profile('ObjectRenderer.draw')
     def draw(self):
         self.draw_background()
         self.render_game_objects()
@@ -29,32 +39,98 @@ class ObjectRenderer:
     def game_over(self):
         self.screen.blit(self.game_over_image, (0, 0))
 
+    def get_digits_image(self, chars):
+        # digits never overlap, so copying them with BLEND_RGBA_MAX keeps their alpha intact
+        image = pg.Surface((len(chars) * self.digit_size, self.digit_size), pg.SRCALPHA)
+        for i, char in enumerate(chars):
+            image.blit(self.digits[char], (i * self.digit_size, 0), special_flags=pg.BLEND_RGBA_MAX)
+        return image
+
     def draw_player_health(self):
         health = max(0, self.game.player.health)  # Ensure health is not negative
-        health_str = str(health).zfill(2)  # Ensure at least two digits
-        for i, char in enumerate(health_str):
-            self.screen.blit(self.digits[char], (i * self.digit_size + 40, 20))
-        self.screen.blit(self.digits['10'], ((i + 1) * self.digit_size + 40, 20))
+        if health != self.health_value:
+            health_str = str(health).zfill(2)  # Ensure at least two digits
+            self.health_image = self.get_digits_image([*health_str, '10'])
+            self.health_value = health
+        self.screen.blit(self.health_image, (40, 20))
 
     def player_damage(self):
         self.screen.blit(self.blood_screen, (0, 0))
 
     def draw_background(self):
-        self.sky_offset = (self.sky_offset + 4.5 * self.game.player.rel) % WIDTH
+        self.sky_offset = SKY_SCROLL * WIDTH * self.game.player.render_angle / math.tau % WIDTH
         self.screen.blit(self.sky_image, (-self.sky_offset, 0))
         self.screen.blit(self.sky_image, (-self.sky_offset + WIDTH, 0))
         # floor
         pg.draw.rect(self.screen, FLOOR_COLOR, (0, HALF_HEIGHT, WIDTH, HEIGHT))
 
     def render_game_objects(self):
+        if RENDER_MODE == 'framebuffer':
+            self.render_framebuffer()
+            return
         list_objects = sorted(self.game.raycasting.objects_to_render, key=lambda t: t[0], reverse=True)
         for depth, image, pos in list_objects:
             self.screen.blit(image, pos)
 
+    def get_wall_pixels(self):
+        # wall textures as screen-format pixel values, flattened from [texture, y, x]
+        textures = self.wall_textures
+        wall_pixels = np.zeros((max(textures) + 1, TEXTURE_SIZE, TEXTURE_SIZE), dtype=np.uint32)
+        for texture_id, texture in textures.items():
+            wall_pixels[texture_id] = pg.surfarray.array2d(texture.convert(self.screen)).T
+        return wall_pixels.ravel()
+
+    def render_framebuffer(self):
+        _, proj_height, texture, offset = self.game.raycasting.get_result_arrays()
+        self.draw_walls(proj_height, texture, offset)
+
+        # sprites far to near, clipped to the screen columns where no wall is closer
+        column_depth = np.repeat(self.game.raycasting.depth_buffer, SCALE)
+        sprites = sorted(self.game.raycasting.objects_to_render, key=lambda t: t[0], reverse=True)
+        for sprite_depth, image, pos in sprites:
+            x, y = int(pos[0]), int(pos[1])
+            left, right = max(x, 0), min(x + image.get_width(), WIDTH)
+            if left >= right:
+                continue
+            visible = np.flatnonzero(np.diff(np.concatenate(
+                ([False], column_depth[left:right] > sprite_depth, [False])).view(np.int8)))
+            for start, end in zip(visible[::2], visible[1::2]):
+                area = (left - x + start, 0, end - start, image.get_height())
+                self.screen.blit(image, (left + start, y), area)
+
+    def draw_walls(self, proj_height, texture, offset):
+        # only the rows spanned by the tallest wall need sampling
+        half_span = min(HALF_HEIGHT, int(proj_height.max()) // 2 + 1)
+        rows = self.screen_rows[HALF_HEIGHT - half_span:HALF_HEIGHT + half_span, None]
+
+        # flat [texture, y, x] index of every sampled texel, laid out [row, ray]
+        column = (offset * (TEXTURE_SIZE - SCALE)).astype(np.int32)
+        tex_y = rows * (TEXTURE_SIZE / proj_height).astype(np.float32)
+        tex_y += HALF_TEXTURE_SIZE
+        mask = (tex_y >= 0) & (tex_y < TEXTURE_SIZE)
+        np.clip(tex_y, 0, TEXTURE_SIZE - 1, out=tex_y)
+        index = tex_y.astype(np.int32)
+        index *= TEXTURE_SIZE
+        index += texture.astype(np.int32) * TEXTURE_SIZE ** 2 + column
+
+        # one gather per screen column of a ray, written row-major into the locked screen
+        frame = pg.surfarray.pixels2d(self.screen).T[HALF_HEIGHT - half_span:HALF_HEIGHT + half_span]
+        for shift in range(SCALE):
+            np.copyto(frame[:, shift::SCALE], self.wall_pixels.take(index), where=mask)
+            index += 1
+        del frame
+
     @staticmethod
     def get_texture(path, res=(TEXTURE_SIZE, TEXTURE_SIZE)):
-        texture = pg.image.load(path).convert_alpha()
-        return pg.transform.scale(texture, res)
+        return assets.get_image(path, res)
+
+    @classmethod
+    def get_asset_requests(cls):
+        # (path, res) of every texture loaded in __init__, preloaded behind the landing page
+        return ([(f'resources/textures/{i}.png', (TEXTURE_SIZE, TEXTURE_SIZE)) for i in range(1, 6)] +
+                [('resources/textures/sky.png', (WIDTH, HALF_HEIGHT))] +
+                [(f'resources/textures/digits/{i}.png', [cls.digit_size] * 2) for i in range(11)] +
+                [(f'resources/textures/{name}.png', RES) for name in ('blood_screen', 'game_over', 'win')])
 
     def load_wall_textures(self):
         return {
@@ -66,8 +142,7 @@ class ObjectRenderer:
         }
         
     def draw_score(self):
-        score = str(self.game.score).zfill(4) 
-        score_width = len(score) * self.digit_size
-        start_x = (WIDTH - score_width)
-        for i, char in enumerate(score):
-            self.screen.blit(self.digits[char], (start_x + i * self.digit_size - 40, 20))
+        if self.game.score != self.score_value:
+            self.score_image = self.get_digits_image(str(self.game.score).zfill(4))
+            self.score_value = self.game.score
+        self.screen.blit(self.score_image, (WIDTH - self.score_image.get_width() - 40, 20))
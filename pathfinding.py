@@ -1,5 +1,9 @@
+import math
 from collections import deque
-from functools import lru_cache
+from heapq import heappush, heappop
+from cache import LRUCache
+from profiler import profiler, profile
+from settings import *
 
 
 class PathFinding:
@@ -8,20 +12,113 @@ class PathFinding:
         self.map = game.map.mini_map
         self.ways = [-1, 0], [0, -1], [1, 0], [0, 1], [-1, -1], [1, -1], [1, 1], [-1, 1]
         self.graph = {}
-        self.get_graph()
+        if game.map.nav is not None:
+            self.graph = game.map.nav_graph
+        else:
+            self.get_graph()
+        self.map_version = game.map.version
+        self.flow_field = {}
+        self.flow_goal = None
+        self.path_cache = LRUCache(PATH_CACHE_SIZE)
+        self.occupancy_version = None
+        self.blocked = frozenset()
+        self.quota_tick, self.searches = None, 0
+        self.search_engines = {'bfs': self.bfs, 'astar': self.astar, 'jps': self.jps}
+        self.search = self.search_engines[PATH_SEARCH]
 
-    @lru_cache
     def get_path(self, start, goal):
-        self.visited = self.bfs(start, goal, self.graph)
-        path = [goal]
-        step = self.visited.get(goal, start)
+        self.check_map_version()
+        self.check_occupancy_version()
+        if PATHFINDING_MODE == 'flow_field':
+            return self.get_flow_step(start, goal)
+        return self.search_path(start, goal)
 
-        while step and step != start:
-            path.append(step)
-            step = self.visited[step]
-        return path[-1]
+    def check_map_version(self):
+        if self.map_version != self.game.map.version:
+            self.map_version = self.game.map.version
+            self.graph = {}
+            self.get_graph()
+            self.flow_goal = None
+            self.invalidate()
 
-    def bfs(self, start, goal, graph):
+    def check_occupancy_version(self):
+        npc_index = self.game.object_handler.npc_index
+        if self.occupancy_version != npc_index.version:
+            self.occupancy_version = npc_index.version
+            self.blocked = frozenset(npc_index.occupied)  # snapshot the worker searches route around
+            self.invalidate()
+
+    def invalidate(self):
+        # cached searches route around NPCs, so they expire when occupancy or the map changes
+        self.path_cache.clear()
+        profiler.count('path cache invalidations')
+
+    def get_flow_step(self, start, goal):
+        # one search per goal tile, then every NPC's next step is a lookup
+        if goal != self.flow_goal:
+            bounds = self.game.object_handler.npc_chunks.get_bounds(*goal)
+            flow_field = self.game.ai_workers.run(('flow_field', goal, self.map_version),
+                                                  self.get_flow_field, goal, self.graph, bounds)
+            if flow_field is not None:  # until then the field towards the previous goal tile is used
+                self.flow_field, self.flow_goal = flow_field, goal
+        # tiles the bounded field missed, walled off inside the active region or outside it, head straight at goal
+        step = self.flow_field.get(start)
+        return goal if step is None else step
+
+    @profile('PathFinding.get_flow_field')
+    def get_flow_field(self, goal, graph, bounds):
+        # breadth-first outward from the goal, every reached tile of the active chunks points one step closer to it
+        x0, y0, x1, y1 = bounds
+        flow_field = {goal: None}
+        queue = deque([goal])
+
+        while queue:
+            cur_node = queue.popleft()
+            for next_node in graph.get(cur_node, []):
+                if next_node not in flow_field and x0 <= next_node[0] < x1 and y0 <= next_node[1] < y1:
+                    queue.append(next_node)
+                    flow_field[next_node] = cur_node
+        return flow_field
+
+    def search_path(self, start, goal):
+        # None when this tick's AI_PATH_QUOTA is spent, the npc then keeps its last step
+        key = start, goal
+        next_step = self.path_cache.get(key)
+        if next_step is None:
+            job = 'path', start, goal, self.map_version
+            if job not in self.game.ai_workers.jobs and not self.take_search():
+                profiler.count('path searches deferred')  # over AI_PATH_QUOTA, asked again next tick
+                return None
+            visited = self.game.ai_workers.run(job, self.search, start, goal, self.graph, self.blocked)
+            if visited is None:
+                return goal  # still searching, head for the goal meanwhile
+            path = [goal]
+            step = visited.get(goal, start)
+
+            while step and step != start:
+                path.append(step)
+                step = visited[step]
+            next_step = path[-1]
+            self.path_cache.put(key, next_step)
+        return next_step
+
+    def record_stats(self):
+        # once per tick, the profiler sums them per frame
+        profiler.count('path cache hits', self.path_cache.hits)
+        profiler.count('path cache misses', self.path_cache.misses)
+        self.path_cache.reset_stats()
+
+    def take_search(self):
+        ticks = self.game.ai_workers.ticks
+        if ticks != self.quota_tick:
+            self.quota_tick, self.searches = ticks, 0
+        if self.searches == AI_PATH_QUOTA:
+            return False
+        self.searches += 1
+        return True
+
+    @profile('PathFinding.bfs')
+    def bfs(self, start, goal, graph, blocked):
         queue = deque([start])
         visited = {start: None}
 
@@ -32,13 +129,140 @@ class PathFinding:
             next_nodes = graph[cur_node]
 
             for next_node in next_nodes:
-                if next_node not in visited and next_node not in self.game.object_handler.npc_positions:
+                if next_node not in visited and next_node not in blocked:
                     queue.append(next_node)
                     visited[next_node] = cur_node
         return visited
 
+    @staticmethod
+    def get_walkable(goal, graph, blocked):
+        # open floor tiles are exactly the graph nodes, other NPCs block everything but the goal
+        blocked = blocked - {goal}
+
+        def walkable(x, y):
+            return (x, y) in graph and (x, y) not in blocked
+        return walkable
+
+    @staticmethod
+    def octile(a, b):
+        dx, dy = abs(a[0] - b[0]), abs(a[1] - b[1])
+        return max(dx, dy) + (math.sqrt(2) - 1) * min(dx, dy)
+
+    def get_neighbours(self, x, y, walkable):
+        # 8-way moves, diagonals only when both side tiles are open so NPCs never clip wall corners
+        for dx, dy in self.ways:
+            if walkable(x + dx, y + dy) and (not dx or not dy or (walkable(x + dx, y) and walkable(x, y + dy))):
+                yield x + dx, y + dy
+
+    @profile('PathFinding.astar')
+    def astar(self, start, goal, graph, blocked):
+        walkable = self.get_walkable(goal, graph, blocked)
+        came_from = {start: None}
+        cost = {start: 0}
+        queue = [(self.octile(start, goal), 0, start)]
+        counter = 0
+
+        while queue:
+            _, _, cur_node = heappop(queue)
+            if cur_node == goal:
+                break
+            x, y = cur_node
+            for next_node in self.get_neighbours(x, y, walkable):
+                next_cost = cost[cur_node] + (1 if x == next_node[0] or y == next_node[1] else math.sqrt(2))
+                if next_cost < cost.get(next_node, math.inf):
+                    cost[next_node] = next_cost
+                    came_from[next_node] = cur_node
+                    counter += 1
+                    heappush(queue, (next_cost + self.octile(next_node, goal), counter, next_node))
+        return came_from
+
+    @profile('PathFinding.jps')
+    def jps(self, start, goal, graph, blocked):
+        # jump point search: A* that only queues the tiles where the optimal route can turn
+        walkable = self.get_walkable(goal, graph, blocked)
+        jumped_from = {start: None}
+        cost = {start: 0}
+        queue = [(self.octile(start, goal), 0, start)]
+        counter = 0
+
+        while queue:
+            _, _, cur_node = heappop(queue)
+            if cur_node == goal:
+                return self.expand_jumps(jumped_from, start, goal)
+            for dx, dy in self.get_jump_directions(cur_node, jumped_from[cur_node], walkable):
+                jump_node = self.jump(cur_node[0] + dx, cur_node[1] + dy, dx, dy, goal, walkable)
+                if jump_node is None:
+                    continue
+                next_cost = cost[cur_node] + self.octile(cur_node, jump_node)
+                if next_cost < cost.get(jump_node, math.inf):
+                    cost[jump_node] = next_cost
+                    jumped_from[jump_node] = cur_node
+                    counter += 1
+                    heappush(queue, (next_cost + self.octile(jump_node, goal), counter, jump_node))
+        return {start: None}
+
+    def get_jump_directions(self, node, parent, walkable):
+        x, y = node
+        if parent is None:
+            return [(nx - x, ny - y) for nx, ny in self.get_neighbours(x, y, walkable)]
+        dx = (x > parent[0]) - (x < parent[0])
+        dy = (y > parent[1]) - (y < parent[1])
+        directions = []
+        if dx and dy:
+            if walkable(x, y + dy):
+                directions.append((0, dy))
+            if walkable(x + dx, y):
+                directions.append((dx, 0))
+            if walkable(x, y + dy) and walkable(x + dx, y):
+                directions.append((dx, dy))
+        else:
+            # straight move: keep going and turn towards sides that just opened up
+            for side in (-1, 1):
+                sx, sy = (0, side) if dx else (side, 0)
+                if walkable(x + sx, y + sy):
+                    directions.append((sx, sy))
+                    if walkable(x + dx, y + dy):
+                        directions.append((dx + sx, dy + sy))
+            if walkable(x + dx, y + dy):
+                directions.append((dx, dy))
+        return directions
+
+    def jump(self, x, y, dx, dy, goal, walkable):
+        while walkable(x, y):
+            if (x, y) == goal:
+                return x, y
+            if dx and dy:
+                if (self.jump(x + dx, y, dx, 0, goal, walkable) or
+                        self.jump(x, y + dy, 0, dy, goal, walkable)):
+                    return x, y
+                if not (walkable(x + dx, y) and walkable(x, y + dy)):
+                    return None
+            elif dx:
+                if ((walkable(x, y - 1) and not walkable(x - dx, y - 1)) or
+                        (walkable(x, y + 1) and not walkable(x - dx, y + 1))):
+                    return x, y
+            elif ((walkable(x - 1, y) and not walkable(x - 1, y - dy)) or
+                    (walkable(x + 1, y) and not walkable(x + 1, y - dy))):
+                return x, y
+            x, y = x + dx, y + dy
+        return None
+
+    @staticmethod
+    def expand_jumps(jumped_from, start, goal):
+        # fill in the tiles between jump points so the result chains one tile at a time like bfs
+        came_from = {start: None}
+        node = goal
+        while node != start:
+            parent = jumped_from[node]
+            dx = (parent[0] > node[0]) - (parent[0] < node[0])
+            dy = (parent[1] > node[1]) - (parent[1] < node[1])
+            while node != parent:
+                came_from[node] = node[0] + dx, node[1] + dy
+                node = came_from[node]
+        return came_from
+
     def get_next_nodes(self, x, y):
-        return [(x + dx, y + dy) for dx, dy in self.ways if (x + dx, y + dy) not in self.game.map.world_map]
+        return [(x + dx, y + dy) for dx, dy in self.ways if not self.game.map.is_wall(x + dx, y + dy)]
 
     def get_graph(self):
         for y, row in enumerate(self.map):
@@ -1,27 +1,34 @@
 from settings import *
 import pygame as pg
 import math
+from profiler import profile
 
 
 class Player:
     def __init__(self, game):
         self.game = game
+        self.health_recovery_delay = 700
+        # diagonal movement correction
+        self.diag_move_corr = 1 / math.sqrt(2)
+        self.reset()
+
+    def reset(self):
+        # back to the start of a round
         self.x, self.y = PLAYER_POS
         self.angle = PLAYER_ANGLE
+        self.prev_x, self.prev_y, self.prev_angle = self.x, self.y, self.angle
+        self.render_x, self.render_y, self.render_angle = self.x, self.y, self.angle
         self.shot = False
         self.health = PLAYER_MAX_HEALTH
         self.rel = 0
-        self.health_recovery_delay = 700
-        self.time_prev = pg.time.get_ticks()
-        # diagonal movement correction
-        self.diag_move_corr = 1 / math.sqrt(2)
+        self.time_prev = self.game.sim_time
 
     def recover_health(self):
         if self.check_health_recovery_delay() and self.health < PLAYER_MAX_HEALTH:
             self.health += 1
 
     def check_health_recovery_delay(self):
-        time_now = pg.time.get_ticks()
+        time_now = self.game.sim_time
         if time_now - self.time_prev > self.health_recovery_delay:
             self.time_prev = time_now
             return True
@@ -33,7 +40,7 @@ class Player:
         return False
 
     def check_victory(self):
-        if len([npc for npc in self.game.object_handler.npc_list if npc.alive]) == 0:
+        if not self.game.object_handler.alive_count:
             self.game.game_ended = True
             return True
         return False
@@ -59,7 +66,7 @@ class Player:
         speed_sin = speed * sin_a
         speed_cos = speed * cos_a
 
-        keys = pg.key.get_pressed()
+        keys = self.get_pressed_keys()
         num_key_pressed = -1
         if keys[pg.K_w]:
             num_key_pressed += 1
@@ -87,8 +94,12 @@ class Player:
 
         self.angle %= math.tau
 
+    @staticmethod
+    def get_pressed_keys():
+        return pg.key.get_pressed()
+
     def check_wall(self, x, y):
-        return (x, y) not in self.game.map.world_map
+        return not self.game.map.is_wall(x, y)
 
     def check_wall_collision(self, dx, dy):
         scale = PLAYER_SIZE_SCALE / self.game.delta_time
@@ -111,7 +122,9 @@ class Player:
         self.rel = max(-MOUSE_MAX_REL, min(MOUSE_MAX_REL, self.rel))
         self.angle += self.rel * MOUSE_SENSITIVITY * self.game.delta_time
 
+    @profile('Player.update')
     def update(self):
+        self.prev_x, self.prev_y, self.prev_angle = self.x, self.y, self.angle
         self.movement()
         self.mouse_control()
         self.recover_health()
@@ -120,10 +133,24 @@ class Player:
         elif self.check_game_over():
             self.game.trigger_game_end('game_over')
 
+    def interpolate(self, alpha):
+        self.render_x = self.prev_x + (self.x - self.prev_x) * alpha
+        self.render_y = self.prev_y + (self.y - self.prev_y) * alpha
+        turn = (self.angle - self.prev_angle + math.pi) % math.tau - math.pi
+        self.render_angle = (self.prev_angle + turn * alpha) % math.tau
+
     @property
     def pos(self):
         return self.x, self.y
 
+    @property
+    def render_pos(self):
+        return self.render_x, self.render_y
+
+    @property
+    def render_map_pos(self):
+        return int(self.render_x), int(self.render_y)
+
     @property
     def map_pos(self):
         return int(self.x), int(self.y)
@@ -0,0 +1,165 @@
+import pygame as pg
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from functools import wraps
+from settings import *
+
+
+class Profiler:
+    def __init__(self, max_frames=PROFILER_FRAMES):
+        self.enabled = PROFILER_ENABLED
+        self.overlay = False
+        self.frames = deque(maxlen=max_frames)  # (frame start, frame duration, [(name, start, duration)])
+        self.events = []
+        self.thread_events = deque(maxlen=max_frames * 8)  # (name, start, duration, tid) from ai worker threads
+        self.counters = {}  # name: total so far this frame, see count
+        self.frame_counters = deque(maxlen=max_frames)
+        self.frame_start = time.perf_counter()
+        self.font = None
+        self.startup = []  # (phase, start, duration) of the staged startup
+
+    def record(self, name, start):
+        # frames and the overlay are main-thread time, worker sections only go to the trace on their own tid
+        if threading.current_thread() is threading.main_thread():
+            self.events.append((name, start, time.perf_counter() - start))
+        else:
+            self.thread_events.append((name, start, time.perf_counter() - start, threading.get_native_id()))
+
+    def count(self, name, value=1):
+        # per-frame totals such as sprites culled, summarised next to the sections
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_startup(self, phase, start):
+        self.startup.append((phase, start, time.perf_counter() - start))
+
+    def get_startup_report(self):
+        # phases overlap: assets and the blockchain stack load while the landing page is already up
+        origin = min(start for _, start, _ in self.startup)
+        lines = [f'{"at ms":>8} {"ms":>8}  startup phase']
+        for phase, start, duration in sorted(self.startup, key=lambda item: item[1]):
+            lines.append(f'{(start - origin) * 1000:8.1f} {duration * 1000:8.1f}  {phase}')
+        return '\n'.join(lines)
+
+    def end_frame(self):
+        time_now = time.perf_counter()
+        if self.enabled:
+            self.frames.append((self.frame_start, time_now - self.frame_start, self.events))
+            self.frame_counters.append(self.counters)
+        self.events = []
+        self.counters = {}
+        self.frame_start = time_now
+
+    @staticmethod
+    def get_section_times(events):
+        totals = {}
+        for name, _, duration in events:
+            totals[name] = totals.get(name, 0) + duration
+        return totals
+
+    def get_summary(self):
+        # mean and worst ms per section over the ring buffer
+        summary = {}
+        for _, frame_time, events in self.frames:
+            for name, duration in (('frame', frame_time), *self.get_section_times(events).items()):
+                total, worst, count = summary.get(name, (0, 0, 0))
+                summary[name] = total + duration, max(worst, duration), count + 1
+        return {name: (total / count * 1000, worst * 1000)
+                for name, (total, worst, count) in summary.items()}
+
+    def get_counter_summary(self):
+        # mean and worst per frame over the ring buffer, a frame that never counted a name adds 0
+        summary = {}
+        for counters in self.frame_counters:
+            for name, value in counters.items():
+                total, worst = summary.get(name, (0, 0))
+                summary[name] = total + value, max(worst, value)
+        return {name: (total / len(self.frame_counters), worst) for name, (total, worst) in summary.items()}
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+
+    def draw(self, screen):
+        if not self.overlay:
+            return
+        if self.font is None:
+            self.font = pg.font.Font(None, 26)
+        rows = [('section', 'avg ms', 'max ms')]
+        for name, (average, worst) in sorted(self.get_summary().items(), key=lambda item: -item[1][0]):
+            rows.append((name, f'{average:.2f}', f'{worst:.2f}'))
+        rows.append(('counter', 'avg', 'max'))
+        for name, (average, worst) in sorted(self.get_counter_summary().items()):
+            rows.append((name, f'{average:.1f}', f'{worst:g}'))
+        top = HEIGHT - 22 * len(rows) - 10
+        pg.draw.rect(screen, 'black', (0, top - 5, 420, HEIGHT - top + 5))
+        for i, (name, average, worst) in enumerate(rows):
+            y = top + 22 * i
+            screen.blit(self.font.render(name, True, 'yellow'), (10, y))
+            for right, value in ((320, average), (410, worst)):
+                text = self.font.render(value, True, 'yellow')
+                screen.blit(text, (right - text.get_width(), y))
+
+    def dump_csv(self, path):
+        with open(path, 'w') as file:
+            file.write('frame,section,start_ms,duration_ms\n')
+            for frame, (frame_start, frame_time, events) in enumerate(self.frames):
+                file.write(f'{frame},frame,{frame_start * 1000:.3f},{frame_time * 1000:.3f}\n')
+                for name, start, duration in events:
+                    file.write(f'{frame},{name},{start * 1000:.3f},{duration * 1000:.3f}\n')
+
+    def dump_trace(self, path):
+        # chrome://tracing / Perfetto "complete" events, timestamps in microseconds
+        main_tid = threading.main_thread().native_id
+        trace_events = [{'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': 1, 'args': {'name': 'startup'}}]
+        for frame_start, frame_time, events in self.frames:
+            trace_events.append({'name': 'frame', 'ph': 'X', 'pid': 0, 'tid': main_tid,
+                                 'ts': frame_start * 1e6, 'dur': frame_time * 1e6})
+            trace_events.extend({'name': name, 'ph': 'X', 'pid': 0, 'tid': main_tid,
+                                 'ts': start * 1e6, 'dur': duration * 1e6}
+                                for name, start, duration in events)
+        trace_events.extend({'name': name, 'ph': 'X', 'pid': 0, 'tid': tid, 'ts': start * 1e6, 'dur': duration * 1e6}
+                            for name, start, duration, tid in self.thread_events)
+        trace_events.extend({'name': phase, 'ph': 'X', 'pid': 0, 'tid': 1, 'ts': start * 1e6, 'dur': duration * 1e6}
+                            for phase, start, duration in self.startup)
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': trace_events}, file)
+
+    def dump(self):
+        path = f'profile_{time.strftime("%Y%m%d_%H%M%S")}'
+        self.dump_csv(path + '.csv')
+        self.dump_trace(path + '.json')
+        print(f'Profile of {len(self.frames)} frames written to {path}.csv and {path}.json')
+
+
+profiler = Profiler()
+
+
+def profile(name):
+    # time every call of the decorated function as a section of the current frame
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not profiler.enabled:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    profiler.record(name, start)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(name, start)
+        return wrapper
+    return decorator
@@ -1,6 +1,9 @@
 import pygame as pg
+import numpy as np
 import math
 from settings import *
+from cache import LRUCache
+from profiler import profiler, profile
 
 
 class RayCasting:
@@ -9,36 +12,82 @@ class RayCasting:
         self.ray_casting_result = []
         self.objects_to_render = []
         self.textures = self.game.object_renderer.wall_textures
-
+        self.column_cache = LRUCache(WALL_COLUMN_CACHE_SIZE)
+        self.result_arrays = None
+        self.sprites_drawn, self.sprites_culled = 0, 0
+        self.ray_cast_engines = {'python': self.ray_cast, 'numpy': self.ray_cast_numpy}
+        self.ray_cast_engine = self.ray_cast_engines[RAY_CASTING_ENGINE]
+
+    def reset(self):
+        # last round's walls, shots before the first cast of a round have no depth buffer to test against
+        self.ray_casting_result = []
+        self.objects_to_render = []
+        self.result_arrays = None
+
+    def get_wall_column(self, texture, column, height, texture_height):
+        # key on the integer crop and output size so repeated columns reuse one surface
+        key = texture, column, height, texture_height
+        wall_column = self.column_cache.get(key)
+        if wall_column is None:
+            wall_column = self.textures[texture].subsurface(
+                column, HALF_TEXTURE_SIZE - texture_height // 2, SCALE, texture_height
+            )
+            wall_column = pg.transform.scale(wall_column, (SCALE, height))
+            self.column_cache.put(key, wall_column)
+        return wall_column
+
+    @profile('RayCasting.get_objects_to_render')
     def get_objects_to_render(self):
         self.objects_to_render = []
         for ray, values in enumerate(self.ray_casting_result):
             depth, proj_height, texture, offset = values
+            column = int(offset * (TEXTURE_SIZE - SCALE))
 
             if proj_height < HEIGHT:
-                wall_column = self.textures[texture].subsurface(
-                    offset * (TEXTURE_SIZE - SCALE), 0, SCALE, TEXTURE_SIZE
-                )
-                wall_column = pg.transform.scale(wall_column, (SCALE, proj_height))
+                wall_column = self.get_wall_column(texture, column, int(proj_height), TEXTURE_SIZE)
                 wall_pos = (ray * SCALE, HALF_HEIGHT - proj_height // 2)
             else:
                 texture_height = TEXTURE_SIZE * HEIGHT / proj_height
-                wall_column = self.textures[texture].subsurface(
-                    offset * (TEXTURE_SIZE - SCALE), HALF_TEXTURE_SIZE - texture_height // 2,
-                    SCALE, texture_height
-                )
-                wall_column = pg.transform.scale(wall_column, (SCALE, HEIGHT))
+                wall_column = self.get_wall_column(texture, column, HEIGHT, int(texture_height))
                 wall_pos = (ray * SCALE, 0)
 
             self.objects_to_render.append((depth, wall_column, wall_pos))
-
+        profiler.count('wall column cache hits', self.column_cache.hits)
+        profiler.count('wall column cache misses', self.column_cache.misses)
+        self.column_cache.reset_stats()
+
+    def get_result_arrays(self):
+        # (depth, proj_height, texture, offset) as per-ray arrays
+        if self.result_arrays is None:
+            depth, proj_height, texture, offset = np.array(self.ray_casting_result).T
+            self.result_arrays = depth, proj_height, texture.astype(np.intp), offset
+        return self.result_arrays
+
+    @property
+    def depth_buffer(self):
+        return self.get_result_arrays()[0]
+
+    def is_occluded(self, screen_x, width, depth):
+        # true when every ray the sprite spans hits a wall nearer than the sprite
+        first = max(int((screen_x - width / 2) // SCALE), 0)
+        last = min(int((screen_x + width / 2) // SCALE) + 1, NUM_RAYS)
+        occluded = first >= last or self.depth_buffer[first:last].max() < depth
+        if occluded:
+            self.sprites_culled += 1
+        else:
+            self.sprites_drawn += 1
+        return occluded
+
+    @profile('RayCasting.ray_cast')
     def ray_cast(self):
         self.ray_casting_result = []
+        self.result_arrays = None
         texture_vert, texture_hor = 1, 1
-        ox, oy = self.game.player.pos
-        x_map, y_map = self.game.player.map_pos
+        tiles, cols, rows = self.game.map.tiles, self.game.map.cols, self.game.map.rows
+        ox, oy = self.game.player.render_pos
+        x_map, y_map = self.game.player.render_map_pos
 
-        ray_angle = self.game.player.angle - HALF_FOV + 0.0001
+        ray_angle = self.game.player.render_angle - HALF_FOV + 0.0001
         for ray in range(NUM_RAYS):
             sin_a = math.sin(ray_angle)
             cos_a = math.cos(ray_angle)
@@ -53,9 +102,9 @@ class RayCasting:
             dx = delta_depth * cos_a
 
             for i in range(MAX_DEPTH):
-                tile_hor = int(x_hor), int(y_hor)
-                if tile_hor in self.game.map.world_map:
-                    texture_hor = self.game.map.world_map[tile_hor]
+                tile_x, tile_y = int(x_hor), int(y_hor)
+                if 0 <= tile_x < cols and 0 <= tile_y < rows and tiles[tile_y * cols + tile_x]:
+                    texture_hor = tiles[tile_y * cols + tile_x]
                     break
                 x_hor += dx
                 y_hor += dy
@@ -71,9 +120,9 @@ class RayCasting:
             dy = delta_depth * sin_a
 
             for i in range(MAX_DEPTH):
-                tile_vert = int(x_vert), int(y_vert)
-                if tile_vert in self.game.map.world_map:
-                    texture_vert = self.game.map.world_map[tile_vert]
+                tile_x, tile_y = int(x_vert), int(y_vert)
+                if 0 <= tile_x < cols and 0 <= tile_y < rows and tiles[tile_y * cols + tile_x]:
+                    texture_vert = tiles[tile_y * cols + tile_x]
                     break
                 x_vert += dx
                 y_vert += dy
@@ -90,7 +139,7 @@ class RayCasting:
                 offset = (1 - x_hor) if sin_a > 0 else x_hor
 
             # remove fishbowl effect
-            depth *= math.cos(self.game.player.angle - ray_angle)
+            depth *= math.cos(self.game.player.render_angle - ray_angle)
 
             # projection
             proj_height = SCREEN_DIST / (depth + 0.0001)
@@ -100,6 +149,90 @@ class RayCasting:
 
             ray_angle += DELTA_ANGLE
 
+    def cast_axis(self, start, step, depth, delta_depth, offset_axis):
+        # all steps of one axis pass for every ray: shape (NUM_RAYS, MAX_DEPTH + 1),
+        # accumulated left to right so values match the scalar loop bit for bit
+        steps = np.empty((NUM_RAYS, MAX_DEPTH + 1, 3))
+        steps[:, 0] = np.column_stack(start + (depth,))
+        steps[:, 1:] = np.column_stack(step + (delta_depth,))[:, None]
+        np.cumsum(steps, axis=1, out=steps)
+        x, y, depth = steps[..., 0], steps[..., 1], steps[..., 2]
+
+        grid = self.game.map.grid
+        rows, cols = grid.shape
+        tile_x, tile_y = np.trunc(x[:, :MAX_DEPTH]), np.trunc(y[:, :MAX_DEPTH])
+        inside = (tile_x >= 0) & (tile_x < cols) & (tile_y >= 0) & (tile_y < rows)
+        tiles = np.where(inside, grid[np.where(inside, tile_y, 0).astype(np.intp),
+                                      np.where(inside, tile_x, 0).astype(np.intp)], 0)
+
+        hit = tiles != 0
+        hit_any = hit.any(axis=1)
+        first = hit.argmax(axis=1)
+        step_index = np.where(hit_any, first, MAX_DEPTH)
+        rays = np.arange(NUM_RAYS)
+
+        # rays that never hit keep the texture of the last ray that did
+        last_hit = np.maximum.accumulate(np.where(hit_any, rays, -1))
+        texture = np.where(last_hit >= 0, tiles[last_hit, first[last_hit]], 1)
+
+        return depth[rays, step_index], steps[rays, step_index, offset_axis], texture
+
+    @profile('RayCasting.ray_cast')
+    def ray_cast_numpy(self):
+        ox, oy = self.game.player.render_pos
+        x_map, y_map = self.game.player.render_map_pos
+
+        ray_angles = np.full(NUM_RAYS, DELTA_ANGLE)
+        ray_angles[0] = self.game.player.render_angle - HALF_FOV + 0.0001
+        np.cumsum(ray_angles, out=ray_angles)
+        sin_a = np.sin(ray_angles)
+        cos_a = np.cos(ray_angles)
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            # horizontals
+            y_hor, dy = np.where(sin_a > 0, y_map + 1, y_map - 1e-6), np.where(sin_a > 0, 1.0, -1.0)
+            depth_hor = (y_hor - oy) / sin_a
+            x_hor = ox + depth_hor * cos_a
+            delta_depth = dy / sin_a
+            dx = delta_depth * cos_a
+            depth_hor, x_hor, texture_hor = self.cast_axis(
+                (x_hor, y_hor), (dx, dy), depth_hor, delta_depth, offset_axis=0)
+
+            # verticals
+            x_vert, dx = np.where(cos_a > 0, x_map + 1, x_map - 1e-6), np.where(cos_a > 0, 1.0, -1.0)
+            depth_vert = (x_vert - ox) / cos_a
+            y_vert = oy + depth_vert * sin_a
+            delta_depth = dx / cos_a
+            dy = delta_depth * sin_a
+            depth_vert, y_vert, texture_vert = self.cast_axis(
+                (x_vert, y_vert), (dx, dy), depth_vert, delta_depth, offset_axis=1)
+
+        # depth, texture offset
+        vert = depth_vert < depth_hor
+        depth = np.where(vert, depth_vert, depth_hor)
+        texture = np.where(vert, texture_vert, texture_hor)
+        y_vert %= 1
+        x_hor %= 1
+        offset = np.where(vert, np.where(cos_a > 0, y_vert, 1 - y_vert),
+                          np.where(sin_a > 0, 1 - x_hor, x_hor))
+
+        # remove fishbowl effect
+        depth *= np.cos(self.game.player.render_angle - ray_angles)
+
+        # projection
+        proj_height = SCREEN_DIST / (depth + 0.0001)
+
+        # ray casting result
+        self.ray_casting_result = list(zip(depth.tolist(), proj_height.tolist(),
+                                           texture.tolist(), offset.tolist()))
+        self.result_arrays = depth, proj_height, texture.astype(np.intp), offset
+
+    @profile('RayCasting.update')
     def update(self):
-        self.ray_cast()
-        self.get_objects_to_render()
\ No newline at end of file
+        self.sprites_drawn, self.sprites_culled = 0, 0
+        self.ray_cast_engine()
+        if RENDER_MODE == 'framebuffer':
+            # walls are drawn straight into the screen pixels, only sprites are collected
+            self.objects_to_render = []
+        else:
+            self.get_objects_to_render()
\ No newline at end of file
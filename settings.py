@@ -6,7 +6,14 @@ RES = WIDTH, HEIGHT = 1600, 900
 HALF_WIDTH = WIDTH // 2
 HALF_HEIGHT = HEIGHT // 2
 FPS = 0
+MENU_FPS = 30  # the landing page and leaderboard are static, no need to spin
+PRELOAD_SLICE = 25  # ms of background asset loading per landing page frame
+SIM_TICK_RATE = 60  # fixed simulation ticks per second, independent of FPS
+SIM_DT = 1000 / SIM_TICK_RATE  # ms of game time per tick
+MAX_TICKS_PER_FRAME = 5  # past this the game slows down instead of spiralling
+GLOBAL_EVENT_TIME = 40  # ms of game time between global triggers
 
+MAP_FILE = 'resources/maps/level_1.txt'  # None plays the built-in mini_map
 PLAYER_POS = 1.5, 5  # mini_map
 PLAYER_ANGLE = 0
 PLAYER_SPEED = 0.004
@@ -19,17 +26,43 @@ MOUSE_MAX_REL = 40
 MOUSE_BORDER_LEFT = 100
 MOUSE_BORDER_RIGHT = WIDTH - MOUSE_BORDER_LEFT
 
+SKY_SCROLL = 4  # sky image widths scrolled per full turn
+
 FLOOR_COLOR = (30, 30, 30)
 
+PROFILER_ENABLED = True
+PROFILER_FRAMES = 600  # frames kept in the profiler ring buffer
+ASSET_REPORT_LINES = 10  # slowest assets listed in the startup report
+
 FOV = math.pi / 3
 HALF_FOV = FOV / 2
 NUM_RAYS = WIDTH // 2
 HALF_NUM_RAYS = NUM_RAYS // 2
 DELTA_ANGLE = FOV / NUM_RAYS
 MAX_DEPTH = 20
+CHUNK_SIZE = 16  # tiles per side of a streaming chunk
+CHUNK_RADIUS = 3  # chunks each side of the player's chunk that are simulated and drawn
+PATHFINDING_MODE = 'flow_field'  # 'flow_field' or 'search'
+PATH_SEARCH = 'astar'  # search mode engine: 'bfs', 'astar' or 'jps'
+PATH_CACHE_SIZE = 256  # (start, goal) next steps kept by the search mode
+NPC_STATE = 'objects'  # 'objects' or 'arrays' (core npc state in shared numpy arrays)
+AI_NEAR_DIST = 8  # idle npcs closer than this (tiles) think every AI_IDLE_INTERVAL ticks
+AI_IDLE_INTERVAL = 4
+AI_FAR_INTERVAL = 12  # ticks between updates of idle npcs further away
+AI_TIME_BUDGET = 2  # ms per tick for npc updates, reduced-rate ones get what full-rate ones leave
+AI_PATH_QUOTA = 8  # new path searches per tick, npcs over it keep their last step
+AI_LOS_QUOTA = 64  # line-of-sight rays per tick, npcs over it keep their last answer
+AI_WORKERS = 2  # threads for pathfinding and line of sight, 0 runs them inline
+AI_MAX_LATENCY = 2  # ticks an ai result may lag before the main thread waits for it
+RAY_CASTING_ENGINE = 'numpy'  # 'python' or 'numpy'
+RENDER_MODE = 'framebuffer'  # 'blit' or 'framebuffer'
 
 SCREEN_DIST = HALF_WIDTH / math.tan(HALF_FOV)
 SCALE = WIDTH // NUM_RAYS
 
 TEXTURE_SIZE = 256
-HALF_TEXTURE_SIZE = TEXTURE_SIZE // 2
\ No newline at end of file
+HALF_TEXTURE_SIZE = TEXTURE_SIZE // 2
+WALL_COLUMN_CACHE_SIZE = 4096  # scaled wall slices kept between frames
+SPRITE_CACHE_SIZE = 1024  # scaled sprite frames shared by all sprites
+SPRITE_CACHE_BYTES = 128 * 1024 ** 2  # and the most surface memory they may hold
+SPRITE_SIZE_STEP = 2  # projected sprite sizes are rounded to this many pixels
@@ -0,0 +1,70 @@
+import math
+
+
+class SpatialIndex:
+    # entities bucketed by the tile they stand on, rebucketed only when they cross a tile edge
+    def __init__(self):
+        self.buckets = {}  # tile: {entity: None}, dicts keep queries in insertion order
+        self.tiles = {}  # entity: tile
+        self.version = 0  # bumped whenever a tile becomes occupied or empty
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def __iter__(self):
+        return iter(list(self.tiles))
+
+    def __contains__(self, entity):
+        return entity in self.tiles
+
+    @property
+    def occupied(self):
+        return self.buckets.keys()
+
+    def add(self, entity):
+        tile = int(entity.x), int(entity.y)
+        self.tiles[entity] = tile
+        if tile not in self.buckets:
+            self.buckets[tile] = {}
+            self.version += 1
+        self.buckets[tile][entity] = None
+
+    def remove(self, entity):
+        tile = self.tiles.pop(entity)
+        bucket = self.buckets[tile]
+        del bucket[entity]
+        if not bucket:
+            del self.buckets[tile]
+            self.version += 1
+
+    def move(self, entity):
+        if self.tiles[entity] != (int(entity.x), int(entity.y)):
+            self.remove(entity)
+            self.add(entity)
+
+    def get_at(self, tile):
+        return list(self.buckets.get(tile, ()))
+
+    def get_tiles(self, x, y, radius):
+        # scan the square around the point or the occupied tiles, whichever is smaller
+        reach = int(radius) + 1
+        if (2 * reach + 1) ** 2 < len(self.buckets):
+            tile_x, tile_y = int(x), int(y)
+            return [(i, j) for j in range(tile_y - reach, tile_y + reach + 1)
+                    for i in range(tile_x - reach, tile_x + reach + 1) if (i, j) in self.buckets]
+        return [tile for tile in self.buckets if abs(tile[0] - x) <= reach and abs(tile[1] - y) <= reach]
+
+    def get_nearby(self, x, y, radius):
+        return [entity for tile in self.get_tiles(x, y, radius) for entity in self.buckets[tile]
+                if math.hypot(entity.x - x, entity.y - y) <= radius]
+
+    def get_in_view(self, x, y, angle, fov, radius=None):
+        # view cone widened by one tile on each side, so sprites straddling the edge are kept
+        entities = self.tiles if radius is None else self.get_nearby(x, y, radius)
+        in_view = []
+        for entity in entities:
+            dx, dy = entity.x - x, entity.y - y
+            delta = (math.atan2(dy, dx) - angle + math.pi) % math.tau - math.pi
+            if abs(delta) <= fov / 2 + math.atan2(1, math.hypot(dx, dy)):
+                in_view.append(entity)
+        return in_view
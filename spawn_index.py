@@ -0,0 +1,50 @@
+import numpy as np
+from random import getrandbits
+
+
+class SpawnIndex:
+    # walkable cells listed once per map version, sampled without replacement
+    def __init__(self, map):
+        self.map = map
+        self.map_version = None
+        self.cells = None  # (n, 2) array of free (x, y)
+
+    def get_cells(self):
+        if self.map.nav is not None:
+            return self.map.nav.cells  # listed by the sidecar, not kept so the map can unmap it
+        if self.map_version != self.map.version:
+            self.map_version = self.map.version
+            rows, cols = np.nonzero(self.map.grid == 0)
+            self.cells = np.column_stack((cols, rows))
+        return self.cells
+
+    @staticmethod
+    def in_rect(x, y, rect):
+        x0, y0, x1, y1 = rect
+        return (x >= x0) & (x < x1) & (y >= y0) & (y < y1)
+
+    def sample(self, count, exclusions=(), regions=(), occupied=()):
+        # regions are ((x0, y0, x1, y1), weight) with later ones overriding, cells outside every region weigh 1
+        cells = self.get_cells()
+        x, y = cells[:, 0], cells[:, 1]
+        weights = np.ones(len(cells))
+        for rect, weight in regions:
+            weights[self.in_rect(x, y, rect)] = weight
+        for rect in exclusions:
+            weights[self.in_rect(x, y, rect)] = 0
+        if occupied:
+            taken = np.zeros(self.map.grid.shape, dtype=bool)
+            taken_x, taken_y = zip(*occupied)
+            taken[list(taken_y), list(taken_x)] = True
+            weights[taken[y, x]] = 0
+
+        candidates = np.flatnonzero(weights > 0)
+        count = min(count, len(candidates))
+        if not count:
+            return []
+        # Efraimidis-Spirakis: the count largest u ** (1 / w) are a weighted sample without replacement
+        rng = np.random.default_rng(getrandbits(64))
+        keys = rng.random(len(candidates)) ** (1 / weights[candidates])
+        top = np.argpartition(-keys, count - 1)[:count]
+        chosen = candidates[top[np.argsort(-keys[top])]]
+        return [tuple(cell) for cell in cells[chosen].tolist()]
@@ -1,7 +1,24 @@
 import pygame as pg
 from settings import *
-import os
 from collections import deque
+from cache import LRUCache
+from assets import assets
+
+scaled_sprites = LRUCache(SPRITE_CACHE_SIZE, SPRITE_CACHE_BYTES, assets.get_size)
+
+
+def get_scaled_sprite(image, width, height):
+    width = max(1, round(width / SPRITE_SIZE_STEP)) * SPRITE_SIZE_STEP
+    height = max(1, round(height / SPRITE_SIZE_STEP)) * SPRITE_SIZE_STEP
+    if width > WIDTH or height > HEIGHT:
+        # point-blank sprites change size every frame and would flush the cache, scale them directly
+        return pg.transform.scale(image, (width, height))
+    key = image, width, height
+    scaled = scaled_sprites.get(key)
+    if scaled is None:
+        scaled = pg.transform.scale(image, (width, height))
+        scaled_sprites.put(key, scaled)
+    return scaled
 
 
 class SpriteObject:
@@ -10,7 +27,8 @@ class SpriteObject:
         self.game = game
         self.player = game.player
         self.x, self.y = pos
-        self.image = pg.image.load(path).convert_alpha()
+        self.render_x, self.render_y = pos
+        self.image = assets.get_image(path)
         self.IMAGE_WIDTH = self.image.get_width()
         self.IMAGE_HALF_WIDTH = self.image.get_width() // 2
         self.IMAGE_RATIO = self.IMAGE_WIDTH / self.image.get_height()
@@ -23,22 +41,24 @@ class SpriteObject:
         proj = SCREEN_DIST / self.norm_dist * self.SPRITE_SCALE
         proj_width, proj_height = proj * self.IMAGE_RATIO, proj
 
-        image = pg.transform.scale(self.image, (proj_width, proj_height))
-
         self.sprite_half_width = proj_width // 2
+        if self.game.raycasting.is_occluded(self.screen_x, proj_width, self.norm_dist):
+            return
+
+        image = get_scaled_sprite(self.image, proj_width, proj_height)
         height_shift = proj_height * self.SPRITE_HEIGHT_SHIFT
         pos = self.screen_x - self.sprite_half_width, HALF_HEIGHT - proj_height // 2 + height_shift
 
         self.game.raycasting.objects_to_render.append((self.norm_dist, image, pos))
 
     def get_sprite(self):
-        dx = self.x - self.player.x
-        dy = self.y - self.player.y
+        dx = self.render_x - self.player.render_x
+        dy = self.render_y - self.player.render_y
         self.dx, self.dy = dx, dy
         self.theta = math.atan2(dy, dx)
 
-        delta = self.theta - self.player.angle
-        if (dx > 0 and self.player.angle > math.pi) or (dx < 0 and dy < 0):
+        delta = self.theta - self.player.render_angle
+        if (dx > 0 and self.player.render_angle > math.pi) or (dx < 0 and dy < 0):
             delta += math.tau
 
         delta_rays = delta / DELTA_ANGLE
@@ -50,7 +70,8 @@ class SpriteObject:
             self.get_sprite_projection()
 
     def update(self):
-        self.get_sprite()
+        # static sprites have no simulation state, they are only projected each frame
+        pass
 
 
 class AnimatedSprite(SpriteObject):
@@ -60,11 +81,10 @@ class AnimatedSprite(SpriteObject):
         self.animation_time = animation_time
         self.path = path.rsplit('/', 1)[0]
         self.images = self.get_images(self.path)
-        self.animation_time_prev = pg.time.get_ticks()
+        self.animation_time_prev = self.game.sim_time
         self.animation_trigger = False
 
     def update(self):
-        super().update()
         self.check_animation_time()
         self.animate(self.images)
 
@@ -75,15 +95,10 @@ class AnimatedSprite(SpriteObject):
 
     def check_animation_time(self):
         self.animation_trigger = False
-        time_now = pg.time.get_ticks()
+        time_now = self.game.sim_time
         if time_now - self.animation_time_prev > self.animation_time:
             self.animation_time_prev = time_now
             self.animation_trigger = True
 
     def get_images(self, path):
-        images = deque()
-        for file_name in os.listdir(path):
-            if os.path.isfile(os.path.join(path, file_name)):
-                img = pg.image.load(path + '/' + file_name).convert_alpha()
-                images.append(img)
-        return images
+        return deque(assets.get_frames(path))
@@ -0,0 +1,62 @@
+import threading
+from ai_workers import AIWorkerPool
+from settings import AI_MAX_LATENCY
+
+
+def test_inline_pool_answers_immediately():
+    pool = AIWorkerPool(0)
+    assert pool.run('job', pow, 2, 10) == 1024
+    assert 'job' not in pool.jobs
+
+
+def test_submit_keeps_the_first_job_per_key():
+    pool = AIWorkerPool(0)
+    pool.submit('job', lambda: 1)
+    pool.submit('job', lambda: 2)
+    assert pool.get('job') == 1
+    assert pool.get('job') is None
+
+
+def test_worker_result_is_picked_up_on_a_later_tick():
+    pool = AIWorkerPool(1)
+    release = threading.Event()
+    try:
+        pool.submit('job', lambda: release.wait() and 'done')
+        assert pool.get('job') is None  # still running, the caller carries on
+        release.set()
+        pool.jobs['job'][0].result()
+        assert pool.get('job') == 'done'
+        assert pool.late == 0
+    finally:
+        release.set()
+        pool.executor.shutdown()
+
+
+def test_waits_once_the_latency_is_used_up():
+    pool = AIWorkerPool(1)
+    release = threading.Event()
+    try:
+        pool.submit('job', lambda: release.wait() and 'done')
+        for _ in range(AI_MAX_LATENCY):
+            pool.tick()
+        threading.Timer(0.05, release.set).start()
+        assert pool.get('job') == 'done'
+        assert pool.late == 1
+    finally:
+        release.set()
+        pool.executor.shutdown()
+
+
+def test_unclaimed_results_expire():
+    pool = AIWorkerPool(0)
+    pool.submit('job', lambda: 1)
+    for _ in range(AI_MAX_LATENCY + 2):
+        pool.tick()
+    assert 'job' not in pool.jobs
+
+
+def test_clear_drops_pending_jobs():
+    pool = AIWorkerPool(0)
+    pool.submit('job', lambda: 1)
+    pool.clear()
+    assert pool.get('job') is None
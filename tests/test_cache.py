@@ -0,0 +1,76 @@
+from cache import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # b is now the oldest
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_put_existing_key_refreshes_it():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.put('a', 10)
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 10
+
+
+def test_hit_rate():
+    cache = LRUCache(4)
+    assert cache.hit_rate == 0.0
+    cache.put('a', 1)
+    cache.get('a')
+    cache.get('a')
+    cache.get('a')
+    cache.get('missing')
+    assert (cache.hits, cache.misses) == (3, 1)
+    assert cache.hit_rate == 0.75
+    cache.reset_stats()
+    assert (cache.hits, cache.misses, cache.hit_rate) == (0, 0, 0.0)
+
+
+def test_falsy_values_are_hits():
+    cache = LRUCache(4)
+    cache.put('zero', 0)
+    assert cache.get('zero') == 0
+    assert cache.hits == 1
+
+
+def test_clear():
+    cache = LRUCache(4)
+    cache.put('a', 1)
+    cache.clear()
+    assert len(cache) == 0 and 'a' not in cache
+
+
+def test_byte_cap_evicts_until_under_budget():
+    cache = LRUCache(100, max_bytes=10, get_bytes=len)
+    cache.put('a', 'xxxx')
+    cache.put('b', 'xxxx')
+    assert cache.bytes == 8
+    cache.put('c', 'xxxx')
+    assert 'a' not in cache
+    assert cache.bytes == 8
+
+
+def test_byte_cap_tracks_replaced_and_cleared_entries():
+    cache = LRUCache(100, max_bytes=10, get_bytes=len)
+    cache.put('a', 'xxxx')
+    cache.put('a', 'xx')
+    assert cache.bytes == 2
+    cache.clear()
+    assert cache.bytes == 0
+
+
+def test_entry_over_byte_cap_is_not_kept():
+    cache = LRUCache(100, max_bytes=10, get_bytes=len)
+    cache.put('a', 'xx')
+    cache.put('big', 'x' * 11)
+    assert len(cache) == 0 and cache.bytes == 0
@@ -0,0 +1,42 @@
+from chunks import ChunkManager
+from settings import CHUNK_RADIUS, CHUNK_SIZE
+
+
+class Entity:
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+
+def test_bounds_cover_the_active_chunks():
+    x0, y0, x1, y1 = ChunkManager.get_bounds(CHUNK_SIZE + 0.5, 0.5)
+    assert (x0, y0) == ((1 - CHUNK_RADIUS) * CHUNK_SIZE, -CHUNK_RADIUS * CHUNK_SIZE)
+    assert (x1 - x0, y1 - y0) == ((2 * CHUNK_RADIUS + 1) * CHUNK_SIZE,) * 2
+
+
+def test_only_entities_near_the_player_are_active():
+    chunks = ChunkManager()
+    far = (CHUNK_RADIUS + 1) * CHUNK_SIZE + 0.5
+    near, edge, away = Entity(1.5, 1.5), Entity(far - CHUNK_SIZE, 1.5), Entity(far, 1.5)
+    for entity in (near, edge, away):
+        chunks.add(entity)
+    chunks.update(0.5, 0.5)
+    assert chunks.active == [near, edge]
+    assert chunks.is_active(near) and not chunks.is_active(away)
+
+
+def test_active_list_follows_the_player_and_moves():
+    chunks = ChunkManager()
+    far = (CHUNK_RADIUS + 1) * CHUNK_SIZE + 0.5
+    a, b = Entity(1.5, 1.5), Entity(far, 1.5)
+    chunks.add(a)
+    chunks.add(b)
+    chunks.update(0.5, 0.5)
+    assert chunks.active == [a]
+
+    b.x = 1.5
+    chunks.move(b)
+    chunks.update(0.5, 0.5)
+    assert chunks.active == [a, b]  # insertion order, not chunk order
+
+    chunks.update(far + 2 * CHUNK_RADIUS * CHUNK_SIZE, 0.5)
+    assert chunks.active == []
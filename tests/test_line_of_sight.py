@@ -0,0 +1,102 @@
+import math
+import random
+from types import SimpleNamespace
+import pytest
+from line_of_sight import LineOfSight
+from map import Map
+from settings import MAX_DEPTH
+
+
+@pytest.fixture(scope='module')
+def grid():
+    game = SimpleNamespace()
+    return Map(game, path=None).grid
+
+
+def cast_one(origin, position, grid):
+    # the per-npc two-pass dda LineOfSight replaced, kept here as the reference
+    ox, oy = origin
+    x_map, y_map = int(ox), int(oy)
+    npc_x, npc_y = int(position[0]), int(position[1])
+    if (x_map, y_map) == (npc_x, npc_y):
+        return True
+    rows, cols = grid.shape
+
+    def get_tile(x, y):
+        return grid[y, x] if 0 <= x < cols and 0 <= y < rows else 0
+
+    ray_angle = math.atan2(position[1] - oy, position[0] - ox)
+    sin_a, cos_a = math.sin(ray_angle) or 1e-6, math.cos(ray_angle)
+    wall_dist_v, wall_dist_h = 0, 0
+    player_dist_v, player_dist_h = 0, 0
+
+    # horizontals
+    y_hor, dy = (y_map + 1, 1) if sin_a > 0 else (y_map - 1e-6, -1)
+    depth_hor = (y_hor - oy) / sin_a
+    x_hor = ox + depth_hor * cos_a
+    delta_depth = dy / sin_a
+    dx = delta_depth * cos_a
+    for _ in range(MAX_DEPTH):
+        tile_x, tile_y = int(x_hor), int(y_hor)
+        if tile_x == npc_x and tile_y == npc_y:
+            player_dist_h = depth_hor
+            break
+        if get_tile(tile_x, tile_y):
+            wall_dist_h = depth_hor
+            break
+        x_hor += dx
+        y_hor += dy
+        depth_hor += delta_depth
+
+    # verticals
+    x_vert, dx = (x_map + 1, 1) if cos_a > 0 else (x_map - 1e-6, -1)
+    depth_vert = (x_vert - ox) / cos_a
+    y_vert = oy + depth_vert * sin_a
+    delta_depth = dx / cos_a
+    dy = delta_depth * sin_a
+    for _ in range(MAX_DEPTH):
+        tile_x, tile_y = int(x_vert), int(y_vert)
+        if tile_x == npc_x and tile_y == npc_y:
+            player_dist_v = depth_vert
+            break
+        if get_tile(tile_x, tile_y):
+            wall_dist_v = depth_vert
+            break
+        x_vert += dx
+        y_vert += dy
+        depth_vert += delta_depth
+
+    player_dist = max(player_dist_v, player_dist_h)
+    wall_dist = max(wall_dist_v, wall_dist_h)
+    return 0 < player_dist < wall_dist or not wall_dist
+
+
+def get_points(grid, count, rng):
+    rows, cols = grid.shape
+    floor = [(x, y) for y in range(rows) for x in range(cols) if not grid[y, x]]
+    return [(x + rng.uniform(0.05, 0.95), y + rng.uniform(0.05, 0.95)) for x, y in rng.choices(floor, k=count)]
+
+
+def test_batched_cast_matches_scalar_dda(grid):
+    rng = random.Random(0)
+    line_of_sight = LineOfSight(None)
+    for origin in get_points(grid, 20, rng):
+        positions = get_points(grid, 50, rng)
+        expected = [bool(cast_one(origin, position, grid)) for position in positions]
+        assert line_of_sight.cast(origin, positions, grid) == expected
+
+
+def test_axis_aligned_rays_match_scalar_dda(grid):
+    # rays straight along a row or column, where one of the two passes never advances
+    line_of_sight = LineOfSight(None)
+    origin = 1.5, 6.5
+    positions = [(x + 0.5, 6.5) for x in range(2, 15)] + [(1.5, y + 0.5) for y in range(1, 8)]
+    expected = [bool(cast_one(origin, position, grid)) for position in positions]
+    assert line_of_sight.cast(origin, positions, grid) == expected
+
+
+def test_walls_block_and_open_floor_does_not(grid):
+    line_of_sight = LineOfSight(None)
+    # row 6 is open floor, row 2 has walls between x = 3 and 6
+    assert line_of_sight.cast((1.5, 6.5), [(13.5, 6.5), (1.7, 6.2)], grid) == [True, True]
+    assert line_of_sight.cast((4.5, 3.5), [(4.5, 1.5)], grid) == [False]
@@ -0,0 +1,93 @@
+import mmap
+import os
+from types import SimpleNamespace
+import numpy as np
+import pytest
+import map as map_module
+from map import Map
+from map_file import NAV_HEADER, NavGraph, load_map, read_map, read_nav
+from pathfinding import PathFinding
+
+
+@pytest.fixture
+def map_path(tmp_path):
+    path = tmp_path / 'level.txt'
+    path.write_text('\n'.join(''.join(str(value) if value else '.' for value in row)
+                              for row in map_module.mini_map) + '\n')
+    return str(path)
+
+
+def get_game(path):
+    game = SimpleNamespace()
+    game.map = Map(game, path=path)
+    return game
+
+
+def test_sidecar_round_trip(map_path):
+    mini_map, built = load_map(map_path)
+    assert built.buffer is None  # first load builds the data and writes the sidecar
+    _, mapped = load_map(map_path)
+    assert isinstance(mapped.buffer, mmap.mmap)
+    for name in ('tiles', 'cells', 'offsets', 'edges', 'index'):
+        assert np.array_equal(getattr(built, name), getattr(mapped, name)), name
+    assert mini_map == [[value or False for value in row] for row in map_module.mini_map]
+
+
+def test_stale_sidecar_is_rebuilt(map_path):
+    load_map(map_path)
+    with open(map_path) as file:
+        rows = file.read().splitlines()
+    rows[1] = rows[1][:1] + '2' + rows[1][2:]
+    with open(map_path, 'w') as file:
+        file.write('\n'.join(rows) + '\n')
+
+    _, digest = read_map(map_path)
+    assert read_nav(map_path + '.nav', digest) is None  # hash no longer matches the map file
+    _, nav = load_map(map_path)
+    assert nav.buffer is None and nav.tiles[1, 1] == 2
+    _, nav = load_map(map_path)
+    assert nav.buffer is not None and nav.tiles[1, 1] == 2
+
+
+@pytest.mark.parametrize('damage', ['header', 'body', 'version'])
+def test_damaged_sidecar_is_rebuilt(map_path, damage):
+    load_map(map_path)
+    with open(map_path + '.nav', 'r+b') as file:
+        if damage == 'header':
+            file.truncate(NAV_HEADER.size - 1)
+        elif damage == 'body':
+            file.truncate(os.path.getsize(map_path + '.nav') - 1)  # header intact, last index entry cut
+        else:
+            file.seek(8)
+            file.write((1).to_bytes(4, 'little'))
+    _, digest = read_map(map_path)
+    assert read_nav(map_path + '.nav', digest) is None
+    _, nav = load_map(map_path)
+    assert nav.buffer is None
+
+
+def test_nav_graph_matches_get_graph(map_path):
+    load_map(map_path)
+    game = get_game(map_path)
+    assert isinstance(game.map.nav_graph, NavGraph)
+    pathfinding = PathFinding(game)
+    pathfinding.graph = {}
+    pathfinding.get_graph()
+    assert dict(game.map.nav_graph) == pathfinding.graph
+    assert (0, 0) not in game.map.nav_graph and (-1, 5) not in game.map.nav_graph
+    with pytest.raises(KeyError):
+        game.map.nav_graph[(0, 0)]
+    game.map.close_nav()
+
+
+def test_reset_unmaps_the_sidecar(map_path):
+    load_map(map_path)
+    game = get_game(map_path)
+    buffer, graph = game.map.nav_buffer, game.map.nav_graph
+    game.map.set_tile(1, 1, 2)
+    assert game.map.nav is None
+    assert graph[(2, 1)]  # searches still running keep a usable graph until the reload
+    game.map.reset()
+    assert buffer.closed
+    assert not game.map.nav_buffer.closed and game.map.get_tile(1, 1) == 0
+    game.map.close_nav()
@@ -0,0 +1,76 @@
+import math
+import random
+from types import SimpleNamespace
+import pytest
+from map import Map
+from pathfinding import PathFinding
+
+
+@pytest.fixture(scope='module')
+def pathfinding():
+    game = SimpleNamespace()
+    game.map = Map(game, path=None)
+    return PathFinding(game)
+
+
+def get_pairs(pathfinding, count=40):
+    cells = sorted(pathfinding.graph)
+    rng = random.Random(0)
+    return [tuple(rng.sample(cells, 2)) for _ in range(count)]
+
+
+def get_route(came_from, start, goal):
+    route = [goal]
+    while route[-1] != start:
+        route.append(came_from[route[-1]])
+    return route[::-1]
+
+
+def get_cost(route):
+    return sum(1 if a[0] == b[0] or a[1] == b[1] else math.sqrt(2) for a, b in zip(route, route[1:]))
+
+
+def assert_walkable_route(pathfinding, route, blocked=frozenset()):
+    walkable = pathfinding.get_walkable(route[-1], pathfinding.graph, blocked)
+    for (x, y), (next_x, next_y) in zip(route, route[1:]):
+        dx, dy = next_x - x, next_y - y
+        assert max(abs(dx), abs(dy)) == 1
+        assert walkable(next_x, next_y)
+        if dx and dy:
+            assert walkable(x + dx, y) and walkable(x, y + dy)  # no cutting wall corners
+
+
+def test_jps_matches_astar_cost(pathfinding):
+    for start, goal in get_pairs(pathfinding):
+        astar_route = get_route(pathfinding.astar(start, goal, pathfinding.graph, frozenset()), start, goal)
+        jps_route = get_route(pathfinding.jps(start, goal, pathfinding.graph, frozenset()), start, goal)
+        assert_walkable_route(pathfinding, astar_route)
+        assert_walkable_route(pathfinding, jps_route)
+        assert get_cost(jps_route) == pytest.approx(get_cost(astar_route))
+
+
+def test_bfs_takes_no_more_steps_than_astar(pathfinding):
+    # bfs walks the raw graph, which allows corner cuts, so it can only be shorter in steps
+    for start, goal in get_pairs(pathfinding):
+        bfs_route = get_route(pathfinding.bfs(start, goal, pathfinding.graph, frozenset()), start, goal)
+        astar_route = get_route(pathfinding.astar(start, goal, pathfinding.graph, frozenset()), start, goal)
+        assert all(b in pathfinding.graph[a] for a, b in zip(bfs_route, bfs_route[1:]))
+        assert len(bfs_route) <= len(astar_route)
+
+
+@pytest.mark.parametrize('engine', ['astar', 'jps'])
+def test_routes_around_blocked_tiles(pathfinding, engine):
+    start, goal = (1, 1), (5, 1)
+    blocked = frozenset({(3, 1), (5, 1)})  # the goal itself may be occupied by the player's tile
+    came_from = getattr(pathfinding, engine)(start, goal, pathfinding.graph, blocked)
+    route = get_route(came_from, start, goal)
+    assert (3, 1) not in route
+    assert_walkable_route(pathfinding, route, blocked)
+
+
+@pytest.mark.parametrize('engine', ['astar', 'jps'])
+def test_unreachable_goal(pathfinding, engine):
+    start, goal = (1, 1), (3, 1)
+    blocked = frozenset({(2, 1), (1, 2), (2, 2)})
+    came_from = getattr(pathfinding, engine)(start, goal, pathfinding.graph, blocked)
+    assert goal not in came_from
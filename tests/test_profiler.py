@@ -0,0 +1,32 @@
+import pygame as pg
+from profiler import Profiler
+
+
+def test_counters_are_summarised_per_frame():
+    profiler = Profiler(max_frames=4)
+    profiler.enabled = True
+    profiler.count('sprites culled', 3)
+    profiler.count('sprites culled')
+    profiler.end_frame()
+    profiler.end_frame()  # nothing culled this frame
+    profiler.count('sprites culled', 2)
+    profiler.end_frame()
+    assert profiler.get_counter_summary() == {'sprites culled': (2.0, 4)}
+
+
+def test_disabled_profiler_counts_nothing():
+    profiler = Profiler()
+    profiler.enabled = False
+    profiler.count('sprites culled')
+    profiler.end_frame()
+    assert profiler.get_counter_summary() == {}
+
+
+def test_overlay_draws_sections_and_counters():
+    pg.font.init()
+    profiler = Profiler()
+    profiler.enabled = True
+    profiler.overlay = True
+    profiler.count('sprites drawn', 5)
+    profiler.end_frame()
+    profiler.draw(pg.Surface((1600, 900)))
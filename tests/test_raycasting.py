@@ -0,0 +1,49 @@
+import math
+import random
+from types import SimpleNamespace
+import pytest
+from map import Map
+from raycasting import RayCasting
+
+
+class Viewer:
+    def __init__(self, x, y, angle):
+        self.render_x, self.render_y, self.render_angle = x, y, angle
+
+    @property
+    def render_pos(self):
+        return self.render_x, self.render_y
+
+    @property
+    def render_map_pos(self):
+        return int(self.render_x), int(self.render_y)
+
+
+@pytest.fixture(scope='module')
+def raycasting():
+    game = SimpleNamespace()
+    game.map = Map(game, path=None)
+    raycasting = object.__new__(RayCasting)  # the casters only need the map and the viewer, not textures
+    raycasting.game = game
+    return raycasting
+
+
+def get_poses(game_map, count):
+    rng = random.Random(0)
+    floor = [(x, y) for y in range(game_map.rows) for x in range(game_map.cols) if not game_map.is_wall(x, y)]
+    poses = []
+    for i in range(count):
+        x, y = rng.choice(floor)
+        # every fourth pose looks straight along an axis
+        angle = (i // 4 % 4) * math.pi / 2 if i % 4 == 0 else rng.uniform(0, math.tau)
+        poses.append((x + rng.uniform(0.05, 0.95), y + rng.uniform(0.05, 0.95), angle))
+    return poses
+
+
+def test_numpy_engine_matches_python_engine(raycasting):
+    for x, y, angle in get_poses(raycasting.game.map, 300):
+        raycasting.game.player = Viewer(x, y, angle)
+        raycasting.ray_cast()
+        expected = raycasting.ray_casting_result
+        raycasting.ray_cast_numpy()
+        assert raycasting.ray_casting_result == expected, (x, y, angle)
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+import numpy as np
+from chunks import ChunkManager
+from object_handler import ObjectHandler
+from settings import HALF_WIDTH, NUM_RAYS
+from spatial_index import SpatialIndex
+
+
+class Target:
+    SPRITE_SCALE, IMAGE_RATIO = 0.7, 0.5
+
+    def __init__(self, x, y, offset=0):
+        # the player stands at (2, 2) looking along +x, so norm_dist is the distance ahead
+        self.x, self.y = x, y
+        self.norm_dist = x - 2
+        self.screen_x = HALF_WIDTH + offset
+        self.damage = 0
+
+    def get_damage(self, damage):
+        self.damage += damage
+
+
+def make_handler(wall_depth, targets):
+    player = SimpleNamespace(render_x=2, render_y=2, render_angle=0, shot=True)
+    raycasting = SimpleNamespace(ray_casting_result=[None] * NUM_RAYS,
+                                 depth_buffer=np.full(NUM_RAYS, float(wall_depth)))
+    game = SimpleNamespace(player=player, raycasting=raycasting, weapon=SimpleNamespace(damage=50))
+    handler = object.__new__(ObjectHandler)
+    handler.game = game
+    handler.npc_index, handler.npc_chunks = SpatialIndex(), ChunkManager()
+    for target in targets:
+        handler.npc_index.add(target)
+        handler.npc_chunks.add(target)
+    handler.npc_chunks.update(2, 2)
+    return handler
+
+
+def test_nearest_of_overlapping_npcs_is_hit():
+    near, far = Target(5.5, 2.1), Target(8.5, 2.1)
+    handler = make_handler(10, [far, near])
+    handler.resolve_shot()
+    assert (near.damage, far.damage) == (50, 0)
+    assert not handler.game.player.shot
+
+
+def test_npc_behind_a_wall_is_not_hit():
+    hidden = Target(8.5, 2.1)
+    handler = make_handler(4, [hidden])
+    handler.resolve_shot()
+    assert hidden.damage == 0
+    assert handler.game.player.shot  # the shot is still pending for a later tick
+
+
+def test_npc_beside_the_crosshair_is_not_hit():
+    aside = Target(5.5, 2.1, offset=300)
+    handler = make_handler(10, [aside])
+    handler.resolve_shot()
+    assert aside.damage == 0
+
+
+def test_no_depth_buffer_yet():
+    target = Target(5.5, 2.1)
+    handler = make_handler(10, [target])
+    handler.game.raycasting.ray_casting_result = []
+    handler.resolve_shot()
+    assert target.damage == 0
@@ -0,0 +1,78 @@
+import math
+from spatial_index import SpatialIndex
+
+
+class Entity:
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+
+def test_add_and_get_at():
+    index = SpatialIndex()
+    a, b, c = Entity(1.2, 1.8), Entity(1.9, 1.1), Entity(2.5, 1.5)
+    for entity in (a, b, c):
+        index.add(entity)
+    assert index.get_at((1, 1)) == [a, b]
+    assert index.get_at((2, 1)) == [c]
+    assert index.get_at((3, 3)) == []
+    assert len(index) == 3 and a in index
+
+
+def test_move_rebuckets_only_across_tile_edges():
+    index = SpatialIndex()
+    a, b = Entity(1.5, 1.5), Entity(1.5, 1.5)
+    index.add(a)
+    index.add(b)
+    version = index.version
+    a.x = 1.9
+    index.move(a)
+    assert index.version == version  # same tile, nothing changed
+    a.x = 2.1
+    index.move(a)
+    assert index.get_at((1, 1)) == [b]
+    assert index.get_at((2, 1)) == [a]
+    assert index.version > version
+
+
+def test_remove_drops_empty_buckets():
+    index = SpatialIndex()
+    a = Entity(4.5, 4.5)
+    index.add(a)
+    assert (4, 4) in index.occupied
+    version = index.version
+    index.remove(a)
+    assert a not in index and len(index) == 0
+    assert (4, 4) not in index.occupied
+    assert index.version > version
+
+
+def test_get_nearby_matches_brute_force():
+    index = SpatialIndex()
+    entities = [Entity(x * 0.7 % 20, y * 1.3 % 20) for x in range(20) for y in range(20)]
+    for entity in entities:
+        index.add(entity)
+    for x, y, radius in ((5, 5, 0.5), (10.2, 3.7, 2.5), (0, 0, 4), (19.5, 19.5, 30)):
+        expected = {entity for entity in entities if math.hypot(entity.x - x, entity.y - y) <= radius}
+        assert set(index.get_nearby(x, y, radius)) == expected
+
+
+def test_get_nearby_after_moves():
+    index = SpatialIndex()
+    a, b = Entity(1.5, 1.5), Entity(8.5, 8.5)
+    index.add(a)
+    index.add(b)
+    a.x, a.y = 8.2, 8.2
+    index.move(a)
+    assert set(index.get_nearby(8, 8, 1)) == {a, b}
+    assert index.get_nearby(1.5, 1.5, 1) == []
+
+
+def test_get_in_view():
+    index = SpatialIndex()
+    ahead, behind, side = Entity(10.5, 5.5), Entity(0.5, 5.5), Entity(5.5, 10.5)
+    for entity in (ahead, behind, side):
+        index.add(entity)
+    # looking along +x with a 60 degree cone from (5, 5)
+    assert index.get_in_view(5, 5, 0, math.pi / 3) == [ahead]
+    assert index.get_in_view(5, 5, math.pi / 2, math.pi / 3) == [side]
+    assert index.get_in_view(5, 5, 0, math.pi / 3, radius=3) == []
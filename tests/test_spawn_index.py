@@ -0,0 +1,60 @@
+import random
+from collections import Counter
+from types import SimpleNamespace
+import pytest
+from map import Map
+from spawn_index import SpawnIndex
+
+
+@pytest.fixture
+def spawn_index():
+    random.seed(0)
+    game = SimpleNamespace()
+    return SpawnIndex(Map(game, path=None))
+
+
+def in_rect(cell, rect):
+    x0, y0, x1, y1 = rect
+    return x0 <= cell[0] < x1 and y0 <= cell[1] < y1
+
+
+def test_samples_distinct_free_cells(spawn_index):
+    cells = spawn_index.sample(100)
+    assert len(cells) == 100 == len(set(cells))
+    assert not any(spawn_index.map.is_wall(x, y) for x, y in cells)
+
+
+def test_count_is_capped_by_free_cells(spawn_index):
+    free = len(spawn_index.get_cells())
+    cells = spawn_index.sample(free + 50)
+    assert len(cells) == free == len(set(cells))
+
+
+def test_exclusions_and_occupied_cells_are_never_chosen(spawn_index):
+    exclusion = 0, 0, 8, 8
+    occupied = [(10, 1), (11, 1), (12, 6)]
+    for _ in range(20):
+        cells = spawn_index.sample(60, exclusions=[exclusion], occupied=occupied)
+        assert len(cells) == 60 == len(set(cells))
+        assert not any(in_rect(cell, exclusion) for cell in cells)
+        assert not set(cells) & set(occupied)
+
+
+def test_everything_excluded(spawn_index):
+    assert spawn_index.sample(5, exclusions=[(0, 0, 100, 100)]) == []
+
+
+def test_region_weights_bias_the_sample(spawn_index):
+    heavy, empty = (0, 0, 16, 8), (0, 24, 16, 32)
+    counts = Counter()
+    for _ in range(200):
+        for cell in spawn_index.sample(5, regions=[(heavy, 20), (empty, 0)]):
+            counts['heavy' if in_rect(cell, heavy) else 'empty' if in_rect(cell, empty) else 'rest'] += 1
+    assert counts['empty'] == 0
+    assert counts['heavy'] > 3 * counts['rest']
+
+
+def test_cells_follow_map_edits(spawn_index):
+    assert (1, 1) in map(tuple, spawn_index.get_cells().tolist())
+    spawn_index.map.set_tile(1, 1, 2)
+    assert (1, 1) not in map(tuple, spawn_index.get_cells().tolist())
@@ -13,6 +13,13 @@ class Weapon(AnimatedSprite):
         self.frame_counter = 0
         self.damage = 50
 
+    def reset(self):
+        # rewind a reload cut short by the end of the round
+        self.images.rotate(self.frame_counter)
+        self.image = self.images[0]
+        self.reloading = False
+        self.frame_counter = 0
+
     def animate_shot(self):
         if self.reloading:
             self.game.player.shot = False